@@ -0,0 +1,117 @@
+# agents/_gemini.py
+import asyncio
+import os
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Type, TypeVar
+from aiolimiter import AsyncLimiter
+from pydantic import BaseModel
+import vertexai
+from vertexai.generative_models import GenerationConfig, GenerativeModel
+from infrastructure.retries import resilient
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Process-wide limits shared by every agent's Gemini calls
+_SEM = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+_BUCKET = AsyncLimiter(max_rate=int(os.getenv("GEMINI_MAX_RPM", "60")), time_period=60)
+
+class ThrottledGemini:
+    """GenerativeModel proxy that applies the shared concurrency and rate limits"""
+
+    def __init__(self, model: GenerativeModel):
+        self.model = model
+
+    @resilient
+    async def generate_content_async(self, prompt: Any, **kwargs) -> Any:
+        """Issue a Gemini request once a concurrency slot and rate token are free"""
+        if kwargs.get("stream"):
+            raise TypeError("use stream_content_async for streaming requests")
+        async with _SEM, _BUCKET:
+            return await self.model.generate_content_async(prompt, **kwargs)
+
+    async def stream_content_async(self, prompt: Any, **kwargs) -> AsyncIterator[Any]:
+        """Stream a Gemini response, holding the concurrency slot until it is consumed
+
+        Not retried: chunks already yielded cannot be taken back.
+        """
+        async with _SEM, _BUCKET:
+            stream = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+            async for chunk in stream:
+                yield chunk
+
+@lru_cache(maxsize=None)
+def _init_vertexai(project_id: str, region: str) -> None:
+    """Initialize the Vertex AI SDK once per project/region"""
+    vertexai.init(project=project_id, location=region)
+
+@lru_cache(maxsize=None)
+def get_gemini(project_id: str, region: str,
+               model_name: str = "gemini-1.5-pro",
+               system_instruction: Optional[str] = None) -> ThrottledGemini:
+    """Return a process-wide Gemini model shared by every agent"""
+    _init_vertexai(project_id, region)
+    return ThrottledGemini(
+        GenerativeModel(model_name, system_instruction=system_instruction)
+    )
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Convert a Pydantic model to the OpenAPI subset accepted as a Gemini response_schema"""
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+    
+    def convert(node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            return convert(definitions[node["$ref"].split("/")[-1]])
+        
+        # Optional[X] is emitted as anyOf [X, null]; Gemini expects nullable instead
+        if "anyOf" in node:
+            variants = [variant for variant in node["anyOf"] if variant.get("type") != "null"]
+            converted = convert(variants[0])
+            if len(variants) < len(node["anyOf"]):
+                converted["nullable"] = True
+            if "description" in node:
+                converted["description"] = node["description"]
+            return converted
+        
+        converted = {
+            key: value for key, value in node.items()
+            if key in ("type", "description", "enum", "format")
+        }
+        if "properties" in node:
+            converted["properties"] = {
+                name: convert(prop) for name, prop in node["properties"].items()
+            }
+            converted["required"] = list(node["properties"])
+        if "items" in node:
+            converted["items"] = convert(node["items"])
+        return converted
+    
+    return convert(schema)
+
+def json_generation_config(model: Type[BaseModel], **kwargs) -> GenerationConfig:
+    """Generation config constraining Gemini output to JSON matching the model"""
+    return GenerationConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema(model),
+        **kwargs
+    )
+
+def entity_scope(kind: str, name: Optional[str]) -> Optional[str]:
+    """Semantic cache scope for prompts about one named entity; None disables reuse"""
+    name = (name or "").strip().lower()
+    return f"{kind}:{name}" if name else None
+
+async def gemini_json(model: Any, prompt: str, schema: Type[ModelT],
+                      semantic_scope: Optional[str] = None) -> ModelT:
+    """Run a greedy schema-constrained Gemini call and validate the reply
+    
+    model is a CachedGemini, which only caches replies that validate.
+    semantic_scope names the entity the prompt is about, letting it reuse
+    replies to near-identical prompts about that same entity.
+    """
+    kwargs = {"semantic_scope": semantic_scope} if semantic_scope else {}
+    response = await model.generate_content_async(
+        prompt, generation_config=json_generation_config(schema, temperature=0),
+        validate=schema.model_validate_json, **kwargs
+    )
+    return schema.model_validate_json(response.text)
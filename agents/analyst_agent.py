@@ -1,14 +1,141 @@
 # agents/analyst_agent.py
-from typing import Dict, Any, List
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import asyncio
+from functools import partial
+from string import Template
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional, Tuple
+from agents._gemini import get_gemini
+from infrastructure.llm_cache import CachedGemini
+from utils.serialization import jdumps, jloads
+from data.prompts.analysis_prompts import ANALYSIS_PROMPTS
 from datetime import datetime
 import json
 
+# Per-startup data blocks; the static instructions live in ANALYSIS_PROMPTS
+_SWOT_TMPL = Template("""
+        Company: $company_name
+        
+        Team Data:
+        $founders
+        
+        Market & Traction:
+        Problem: $problem_statement
+        Solution: $solution_description
+        Market Data: $market_data
+        Traction: $traction
+        
+        Quantitative Analysis:
+        $percentile_rankings
+        
+        Risk Assessment:
+        $red_flags
+        """)
+
+_MEMO_TMPL = Template("""
+        COMPANY OVERVIEW:
+        Company: $company_name
+        Problem: $problem_statement
+        Solution: $solution_description
+        
+        TEAM:
+        $founders
+        
+        MARKET & TRACTION:
+        Market Size: $$${market_size}
+        Current Metrics: $traction
+        
+        FINANCIAL DATA:
+        $financials
+        
+        INVESTMENT SCORING:
+        Overall Score: $overall_score/1.0
+        Component Scores: $component_scores
+        
+        SWOT ANALYSIS:
+        $swot
+        
+        RISK ASSESSMENT:
+        Overall Risk: $overall_risk
+        Key Risks: $red_flags
+        """)
+
+# One startup's block in a batch memo request
+_BATCH_SECTION_TMPL = Template("""
+        ###STARTUP_$index###
+        Company: $company_name
+        Problem: $problem_statement
+        Solution: $solution_description
+        Team: $founders
+        Market Data: $market_data
+        Traction: $traction
+        Financials: $financials
+        Percentile Rankings: $percentile_rankings
+        Overall Score: $overall_score/1.0
+        Component Scores: $component_scores
+        Overall Risk: $overall_risk
+        Key Risks: $red_flags
+        Preliminary Decision: $decision
+        """)
+
+_BATCH_TMPL = Template("""
+        You are preparing investment committee material for $count startups.
+        Each startup's data is delimited by a ###STARTUP_<index>### marker:
+        $sections
+        
+        For every startup, produce:
+        - "swot_analysis": JSON object with "strengths", "weaknesses", "opportunities"
+          and "threats", each a list of 3-5 clear, actionable insights
+        - "investment_memo": a professional investment memo structured as
+          1. Executive Summary, 2. Company Overview, 3. Market Opportunity,
+          4. Team Assessment, 5. Business Model & Traction, 6. Financial Analysis,
+          7. Risk Assessment, 8. Investment Thesis, 9. Recommendation
+        
+        Return a JSON array with exactly $count objects, in startup index order,
+        each shaped as {"startup": index, "swot_analysis": {...}, "investment_memo": "..."}.
+        """)
+
+def _parse_batch_memos(text: str, count: int) -> List[Dict[str, Any]]:
+    """Parse a combined memo/SWOT reply, raising ValueError unless it covers every startup"""
+    generated = jloads(text)
+    if not isinstance(generated, list) or len(generated) != count:
+        raise ValueError("batch reply does not have one entry per startup")
+    
+    by_index = {}
+    for item in generated:
+        if not isinstance(item, dict) or "investment_memo" not in item:
+            raise ValueError("batch reply entry is missing its memo")
+        by_index[item.get("startup")] = {
+            "investment_memo": item["investment_memo"],
+            "swot_analysis": item.get("swot_analysis", {})
+        }
+    
+    if set(by_index) != set(range(count)):
+        raise ValueError("batch reply does not cover every startup index")
+    
+    return [by_index[i] for i in range(count)]
+
 class AnalystAgent:
-    def __init__(self, project_id: str, region: str):
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+    # Profile fields needed for a complete analysis
+    REQUIRED_FIELDS = frozenset((
+        "company_name", "founders", "problem_statement",
+        "solution_description", "market_data", "traction_metrics", "financials"
+    ))
+    
+    def __init__(self, project_id: str, region: str, fast_pass: bool = True):
+        self.gemini_model = CachedGemini(get_gemini(project_id, region))
+        
+        # Static memo/SWOT instructions live in the system instruction so each
+        # request only sends the startup-specific data
+        self.swot_model = CachedGemini(
+            get_gemini(project_id, region, system_instruction=ANALYSIS_PROMPTS["swot"]),
+            model_name="gemini-1.5-pro/swot"
+        )
+        self.memo_model = CachedGemini(
+            get_gemini(project_id, region, system_instruction=ANALYSIS_PROMPTS["investment_memo"]),
+            model_name="gemini-1.5-pro/investment_memo"
+        )
+        
+        # Skip the memo and SWOT Gemini calls for confident PASS decisions
+        self.fast_pass = fast_pass
         
         # Investment thesis weights (configurable)
         self.thesis_weights = {
@@ -20,7 +147,8 @@ class AnalystAgent:
     
     async def synthesize_analysis(self, enriched_profile: Dict[str, Any],
                                 quant_analysis: Dict[str, Any],
-                                risk_analysis: Dict[str, Any]) -> Dict[str, Any]:
+                                risk_analysis: Dict[str, Any],
+                                on_memo_chunk: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
         """Generate final investment memo and recommendation"""
         
         # Calculate investment score
@@ -28,34 +156,164 @@ class AnalystAgent:
             enriched_profile, quant_analysis, risk_analysis
         )
         
-        # Generate SWOT analysis
-        swot_analysis = await self._generate_swot_analysis(
-            enriched_profile, quant_analysis, risk_analysis
-        )
-        
-        # Create investment memo
-        investment_memo = await self._generate_investment_memo(
-            enriched_profile, quant_analysis, risk_analysis, 
-            investment_score, swot_analysis
-        )
-        
         # Generate final recommendation
         recommendation = await self._generate_recommendation(
             investment_score, risk_analysis
         )
         
+        if self._is_fast_pass(recommendation):
+            swot_analysis = self._passed_swot_analysis()
+            investment_memo = f"Passed - see rationale: {recommendation['rationale']}"
+            executive_summary = await self._generate_executive_summary(
+                enriched_profile, investment_score, recommendation
+            )
+        else:
+            # Serialize the profile data shared by the SWOT and memo prompts once
+            fragments = self._serialize_prompt_fragments(
+                enriched_profile, quant_analysis, risk_analysis
+            )
+            
+            # Generate SWOT analysis
+            swot_analysis = await self._generate_swot_analysis(
+                enriched_profile, quant_analysis, risk_analysis, fragments
+            )
+            
+            # Create investment memo alongside the executive summary
+            investment_memo, executive_summary = await asyncio.gather(
+                self._generate_investment_memo(
+                    enriched_profile, quant_analysis, risk_analysis,
+                    investment_score, swot_analysis, fragments, on_memo_chunk
+                ),
+                self._generate_executive_summary(
+                    enriched_profile, investment_score, recommendation
+                )
+            )
+        
+        return self._build_analysis_result(
+            enriched_profile, investment_score, recommendation,
+            investment_memo, swot_analysis, executive_summary
+        )
+    
+    async def synthesize_analysis_batch(self, analyses: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]],
+                                      batch_size: int = 10,
+                                      max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Generate analyses for many startups, sharing one Gemini request per batch"""
+        # Each item is (enriched_profile, quant_analysis, risk_analysis); order is preserved
+        semaphore = asyncio.Semaphore(max_concurrency)
+        batches = [
+            analyses[i:i + batch_size] for i in range(0, len(analyses), batch_size)
+        ]
+        
+        async def run_batch(batch):
+            async with semaphore:
+                return await self._synthesize_batch(batch)
+        
+        batch_results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [result for results in batch_results for result in results]
+    
+    async def _synthesize_batch(self, batch: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Synthesize a single batch of startups with one combined memo/SWOT request"""
+        scored = []
+        for profile, quant, risk in batch:
+            investment_score = await self._calculate_investment_score(profile, quant, risk)
+            recommendation = await self._generate_recommendation(investment_score, risk)
+            scored.append((investment_score, recommendation))
+        
+        # Only startups that still need a memo go into the combined prompt
+        pending = [i for i, (_, rec) in enumerate(scored) if not self._is_fast_pass(rec)]
+        memo_items = []
+        for i in pending:
+            profile, quant, risk = batch[i]
+            investment_score, recommendation = scored[i]
+            memo_items.append((profile, quant, risk, investment_score, recommendation))
+        generated = await self._generate_batch_memos(memo_items) if pending else []
+        
+        # Fall back to individual synthesis when the batch response is unusable
+        if generated is None:
+            fallback = await asyncio.gather(
+                *(self.synthesize_analysis(*batch[i]) for i in pending)
+            )
+            results = dict(zip(pending, fallback))
+        else:
+            results = {}
+            for i, item in zip(pending, generated):
+                profile, _, _ = batch[i]
+                investment_score, recommendation = scored[i]
+                results[i] = self._build_analysis_result(
+                    profile, investment_score, recommendation,
+                    item["investment_memo"], item["swot_analysis"],
+                    await self._generate_executive_summary(
+                        profile, investment_score, recommendation
+                    )
+                )
+        
+        for i, (investment_score, recommendation) in enumerate(scored):
+            if i in results:
+                continue
+            profile, _, _ = batch[i]
+            results[i] = self._build_analysis_result(
+                profile, investment_score, recommendation,
+                f"Passed - see rationale: {recommendation['rationale']}",
+                self._passed_swot_analysis(),
+                await self._generate_executive_summary(
+                    profile, investment_score, recommendation
+                )
+            )
+        
+        return [results[i] for i in range(len(batch))]
+    
+    async def _generate_batch_memos(self, items: List[Tuple[Dict[str, Any], ...]]) -> Optional[List[Dict[str, Any]]]:
+        """Generate memo and SWOT for several startups in one Gemini request"""
+        sections = []
+        for index, (profile, quant, risk, investment_score, recommendation) in enumerate(items):
+            fragments = self._serialize_prompt_fragments(profile, quant, risk)
+            sections.append(_BATCH_SECTION_TMPL.substitute(
+                index=index,
+                company_name=profile.get("company_name", "TBD"),
+                problem_statement=profile.get("problem_statement", ""),
+                solution_description=profile.get("solution_description", ""),
+                founders=fragments["founders"],
+                market_data=fragments["market_data"],
+                traction=fragments["traction"],
+                financials=fragments["financials"],
+                percentile_rankings=fragments["percentile_rankings"],
+                overall_score=f"{investment_score.get('overall_score', 0):.2f}",
+                component_scores=jdumps(investment_score.get("component_scores", {})),
+                overall_risk=f"{risk.get('overall_risk_score', 0.5):.2f}",
+                red_flags=fragments["red_flags"],
+                decision=recommendation.get("decision", "REVIEW")
+            ))
+        
+        prompt = _BATCH_TMPL.substitute(count=len(items), sections="".join(sections))
+        
+        try:
+            response = await self.gemini_model.generate_content_async(
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+                validate=partial(_parse_batch_memos, count=len(items))
+            )
+        except ValueError:
+            return None
+        
+        return _parse_batch_memos(response.text, len(items))
+    
+    def _build_analysis_result(self, profile: Dict[str, Any],
+                               investment_score: Dict[str, Any],
+                               recommendation: Dict[str, Any],
+                               investment_memo: str,
+                               swot_analysis: Dict[str, Any],
+                               executive_summary: str) -> Dict[str, Any]:
+        """Assemble the final analysis payload"""
         return {
             "investment_score": investment_score,
             "recommendation": recommendation,
             "investment_memo": investment_memo,
             "swot_analysis": swot_analysis,
-            "executive_summary": await self._generate_executive_summary(
-                enriched_profile, investment_score, recommendation
-            ),
+            "executive_summary": executive_summary,
             "analysis_metadata": {
                 "analysis_date": datetime.utcnow().isoformat(),
-                "confidence_level": await self._calculate_confidence_level(enriched_profile),
-                "data_completeness": await self._assess_data_completeness(enriched_profile)
+                "confidence_level": self._calculate_confidence_level(profile),
+                "data_completeness": self._assess_data_completeness(profile)
             }
         }
     
@@ -65,17 +323,17 @@ class AnalystAgent:
         """Calculate weighted investment score"""
         
         # Team score (0-1)
-        team_score = await self._score_team(profile)
+        team_score = self._score_team(profile)
         
         # Market score (0-1)
-        market_score = await self._score_market(profile)
+        market_score = self._score_market(profile)
+        
+        # Moat score (0-1)
+        moat_score = self._score_moat(profile)
         
         # Traction score (0-1)
         traction_score = quant.get("overall_score", 0.5)
         
-        # Moat score (0-1)
-        moat_score = await self._score_moat(profile)
-        
         # Calculate weighted score
         weighted_score = (
             team_score * self.thesis_weights["team"] +
@@ -100,7 +358,7 @@ class AnalystAgent:
             "weighted_score": weighted_score
         }
     
-    async def _score_team(self, profile: Dict[str, Any]) -> float:
+    def _score_team(self, profile: Dict[str, Any]) -> float:
         """Score team quality (0-1)"""
         founders = profile.get("founders", [])
         verification = profile.get("founder_verification", {})
@@ -112,12 +370,9 @@ class AnalystAgent:
         score = 0.5  # Base score
         
         # Bonus for relevant experience
-        for founder in founders:
-            experience = founder.get("experience_years", 0)
-            if experience > 5:
-                score += 0.1
-            if "ex-" in founder.get("background", "").lower():
-                score += 0.1
+        experienced = sum(1 for f in founders if f.get("experience_years", 0) > 5)
+        ex_company = sum(1 for f in founders if "ex-" in f.get("background", "").lower())
+        score += 0.1 * (experienced + ex_company)
         
         # Verification bonus/penalty
         for name, ver in verification.items():
@@ -126,7 +381,7 @@ class AnalystAgent:
         
         return min(score, 1.0)
     
-    async def _score_market(self, profile: Dict[str, Any]) -> float:
+    def _score_market(self, profile: Dict[str, Any]) -> float:
         """Score market opportunity (0-1)"""
         market_data = profile.get("market_data", {})
         market_validation = profile.get("market_validation", {})
@@ -146,49 +401,43 @@ class AnalystAgent:
         
         return min(score, 1.0)
     
-    async def _score_moat(self, profile: Dict[str, Any]) -> float:
+    def _score_moat(self, profile: Dict[str, Any]) -> float:
         """Score competitive moat (0-1)"""
         # This would analyze the startup's defensibility
         # For now, return a default score
         return 0.5
     
+    def _serialize_prompt_fragments(self, profile: Dict[str, Any],
+                                    quant: Dict[str, Any],
+                                    risk: Dict[str, Any]) -> Dict[str, str]:
+        """Serialize the JSON blocks embedded in the analysis prompts"""
+        return {
+            "founders": jdumps(profile.get("founders", [])),
+            "market_data": jdumps(profile.get("market_data", {})),
+            "traction": jdumps(profile.get("traction_metrics", {})),
+            "financials": jdumps(profile.get("financials", {})),
+            "percentile_rankings": jdumps(quant.get("percentile_rankings", {})),
+            "red_flags": jdumps(risk.get("red_flags", []))
+        }
+    
     async def _generate_swot_analysis(self, profile: Dict[str, Any],
                                     quant: Dict[str, Any],
-                                    risk: Dict[str, Any]) -> Dict[str, Any]:
+                                    risk: Dict[str, Any],
+                                    fragments: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Generate SWOT analysis"""
-        prompt = f"""
-        Generate a comprehensive SWOT analysis for this startup based on the following data:
-        
-        Company: {profile.get("company_name", "Unknown")}
-        
-        Team Data:
-        {json.dumps(profile.get("founders", []), indent=2)}
-        
-        Market & Traction:
-        Problem: {profile.get("problem_statement", "")}
-        Solution: {profile.get("solution_description", "")}
-        Market Data: {json.dumps(profile.get("market_data", {}), indent=2)}
-        Traction: {json.dumps(profile.get("traction_metrics", {}), indent=2)}
-        
-        Quantitative Analysis:
-        {json.dumps(quant.get("percentile_rankings", {}), indent=2)}
-        
-        Risk Assessment:
-        {json.dumps(risk.get("red_flags", []), indent=2)}
-        
-        Create a SWOT analysis with:
-        - Strengths: 3-5 key strengths
-        - Weaknesses: 3-5 key weaknesses  
-        - Opportunities: 3-5 market opportunities
-        - Threats: 3-5 potential threats
-        
-        Return as JSON with clear, actionable insights.
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+        if fragments is None:
+            fragments = self._serialize_prompt_fragments(profile, quant, risk)
+        
+        prompt = _SWOT_TMPL.substitute(
+            fragments,
+            company_name=profile.get("company_name", "Unknown"),
+            problem_statement=profile.get("problem_statement", ""),
+            solution_description=profile.get("solution_description", "")
+        )
         
         try:
-            return json.loads(response.text)
+            response = await self.swot_model.generate_content_async(prompt, validate=jloads)
+            return jloads(response.text)
         except json.JSONDecodeError:
             return {
                 "strengths": ["Analysis pending"],
@@ -201,54 +450,44 @@ class AnalystAgent:
                                       quant: Dict[str, Any],
                                       risk: Dict[str, Any],
                                       investment_score: Dict[str, Any],
-                                      swot: Dict[str, Any]) -> str:
+                                      swot: Dict[str, Any],
+                                      fragments: Optional[Dict[str, str]] = None,
+                                      on_memo_chunk: Optional[Callable[[str], Any]] = None) -> str:
         """Generate comprehensive investment memo"""
-        prompt = f"""
-        Write a professional investment memo (2-3 pages) for this startup opportunity:
-        
-        COMPANY OVERVIEW:
-        Company: {profile.get("company_name", "TBD")}
-        Problem: {profile.get("problem_statement", "")}
-        Solution: {profile.get("solution_description", "")}
-        
-        TEAM:
-        {json.dumps(profile.get("founders", []), indent=2)}
-        
-        MARKET & TRACTION:
-        Market Size: ${profile.get("market_data", {}).get("tam", "TBD")}
-        Current Metrics: {json.dumps(profile.get("traction_metrics", {}), indent=2)}
-        
-        FINANCIAL DATA:
-        {json.dumps(profile.get("financials", {}), indent=2)}
-        
-        INVESTMENT SCORING:
-        Overall Score: {investment_score.get("overall_score", 0):.2f}/1.0
-        Component Scores: {json.dumps(investment_score.get("component_scores", {}), indent=2)}
-        
-        SWOT ANALYSIS:
-        {json.dumps(swot, indent=2)}
-        
-        RISK ASSESSMENT:
-        Overall Risk: {risk.get("overall_risk_score", 0.5):.2f}
-        Key Risks: {json.dumps(risk.get("red_flags", []), indent=2)}
-        
-        Structure the memo with these sections:
-        1. Executive Summary
-        2. Company Overview  
-        3. Market Opportunity
-        4. Team Assessment
-        5. Business Model & Traction
-        6. Financial Analysis
-        7. Risk Assessment
-        8. Investment Thesis
-        9. Recommendation
-        
-        Write in a professional, analytical tone suitable for an investment committee.
-        Be specific with numbers and provide clear reasoning for the recommendation.
-        """
+        memo_parts = []
+        async for text in self.stream_investment_memo(
+            profile, quant, risk, investment_score, swot, fragments
+        ):
+            memo_parts.append(text)
+            if on_memo_chunk:
+                on_memo_chunk(text)
+        
+        return "".join(memo_parts)
+    
+    async def stream_investment_memo(self, profile: Dict[str, Any],
+                                     quant: Dict[str, Any],
+                                     risk: Dict[str, Any],
+                                     investment_score: Dict[str, Any],
+                                     swot: Dict[str, Any],
+                                     fragments: Optional[Dict[str, str]] = None) -> AsyncIterator[str]:
+        """Stream the investment memo text as Gemini generates it"""
+        if fragments is None:
+            fragments = self._serialize_prompt_fragments(profile, quant, risk)
+        
+        prompt = _MEMO_TMPL.substitute(
+            fragments,
+            company_name=profile.get("company_name", "TBD"),
+            problem_statement=profile.get("problem_statement", ""),
+            solution_description=profile.get("solution_description", ""),
+            market_size=profile.get("market_data", {}).get("tam", "TBD"),
+            overall_score=f"{investment_score.get('overall_score', 0):.2f}",
+            component_scores=jdumps(investment_score.get("component_scores", {})),
+            swot=jdumps(swot),
+            overall_risk=f"{risk.get('overall_risk_score', 0.5):.2f}"
+        )
         
-        response = await self.gemini_model.generate_content_async(prompt)
-        return response.text
+        async for chunk in self.memo_model.stream_content_async(prompt):
+            yield chunk.text
     
     async def _generate_recommendation(self, investment_score: Dict[str, Any],
                                      risk_analysis: Dict[str, Any]) -> Dict[str, Any]:
@@ -275,6 +514,23 @@ class AnalystAgent:
             "key_questions": risk_analysis.get("due_diligence_questions", [])[:5]
         }
     
+    def _is_fast_pass(self, recommendation: Dict[str, Any]) -> bool:
+        """Check whether the memo and SWOT can be skipped for a clear PASS"""
+        return (
+            self.fast_pass
+            and recommendation.get("decision") == "PASS"
+            and recommendation.get("confidence") == "HIGH"
+        )
+    
+    def _passed_swot_analysis(self) -> Dict[str, Any]:
+        """Placeholder SWOT for opportunities passed without a full analysis"""
+        return {
+            "strengths": ["Passed - see rationale"],
+            "weaknesses": ["Passed - see rationale"],
+            "opportunities": ["Passed - see rationale"],
+            "threats": ["Passed - see rationale"]
+        }
+    
     def _calculate_recommendation_confidence(self, score: float, risk: float) -> str:
         """Calculate confidence in recommendation"""
         if abs(score - 0.5) > 0.3:  # Clear signal
@@ -331,7 +587,7 @@ class AnalystAgent:
         Next Steps: {", ".join(recommendation.get("next_steps", [])[:3])}
         """
     
-    async def _calculate_confidence_level(self, profile: Dict[str, Any]) -> str:
+    def _calculate_confidence_level(self, profile: Dict[str, Any]) -> str:
         """Calculate overall confidence in analysis"""
         # Based on data completeness and verification scores
         extraction_confidence = profile.get("extraction_confidence", 0.5)
@@ -343,16 +599,10 @@ class AnalystAgent:
         else:
             return "LOW"
     
-    async def _assess_data_completeness(self, profile: Dict[str, Any]) -> float:
+    def _assess_data_completeness(self, profile: Dict[str, Any]) -> float:
         """Assess completeness of data for analysis"""
-        required_fields = [
-            "company_name", "founders", "problem_statement", 
-            "solution_description", "market_data", "traction_metrics", "financials"
-        ]
-        
-        complete_fields = 0
-        for field in required_fields:
-            if profile.get(field) and profile[field] != "":
-                complete_fields += 1
+        complete_fields = self.REQUIRED_FIELDS.intersection(
+            field for field, value in profile.items() if value
+        )
         
-        return complete_fields / len(required_fields)
+        return len(complete_fields) / len(self.REQUIRED_FIELDS)
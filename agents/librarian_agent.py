@@ -1,10 +1,13 @@
 # agents/librarian_agent.py
-import json
-from typing import Dict, Any, List
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import asyncio
+import copy
+import re
+from typing import Dict, Any, List, Optional
+from agents._gemini import get_gemini, json_generation_config
+from infrastructure.llm_cache import CachedGemini
 from pydantic import BaseModel, Field
 from data.prompts.extraction_prompts import EXTRACTION_PROMPTS
+from utils.cpu_pool import run_cpu_bound
 
 class StartupProfile(BaseModel):
     company_name: str = Field(description="Name of the startup")
@@ -17,20 +20,204 @@ class StartupProfile(BaseModel):
     competitive_landscape: List[str] = Field(description="Mentioned competitors")
     technology_stack: List[str] = Field(description="Technology used")
 
+class FounderInfo(BaseModel):
+    name: str = Field(default="", description="Founder name")
+    background: str = Field(default="", description="Brief background description")
+    experience_years: float = Field(default=0, description="Years of experience")
+    previous_companies: List[str] = Field(default_factory=list, description="Previous employers")
+    education: str = Field(default="", description="University/Degree")
+    role: str = Field(default="", description="CEO/CTO/etc")
+
+class FoundersResponse(BaseModel):
+    founders: List[FounderInfo] = Field(default_factory=list, description="Founders and co-founders")
+
+class MarketResponse(BaseModel):
+    tam: Optional[float] = Field(default=None, description="Total addressable market")
+    sam: Optional[float] = Field(default=None, description="Serviceable addressable market")
+    som: Optional[float] = Field(default=None, description="Serviceable obtainable market")
+    target_market: str = Field(default="", description="Target market description")
+    market_growth_rate: Optional[float] = Field(default=None, description="Market growth rate")
+    market_trends: List[str] = Field(default_factory=list, description="Market trends")
+
+class TractionResponse(BaseModel):
+    mrr: Optional[float] = Field(default=None, description="Monthly recurring revenue")
+    arr: Optional[float] = Field(default=None, description="Annual recurring revenue")
+    cac: Optional[float] = Field(default=None, description="Customer acquisition cost")
+    ltv: Optional[float] = Field(default=None, description="Customer lifetime value")
+    churn_rate: Optional[float] = Field(default=None, description="Churn rate")
+    user_count: Optional[int] = Field(default=None, description="Number of users")
+    customer_count: Optional[int] = Field(default=None, description="Number of customers")
+    growth_rate: Optional[float] = Field(default=None, description="Growth rate")
+    key_metrics: List[str] = Field(default_factory=list, description="Other metrics as 'metric: value'")
+
+class FundingRound(BaseModel):
+    round: str = Field(default="", description="Seed/Series A/etc")
+    amount: Optional[float] = Field(default=None, description="Amount raised")
+    date: str = Field(default="", description="YYYY-MM-DD")
+    investors: List[str] = Field(default_factory=list, description="Investors in the round")
+
+class FinancialsResponse(BaseModel):
+    revenue: Optional[float] = Field(default=None, description="Current revenue")
+    burn_rate: Optional[float] = Field(default=None, description="Monthly burn rate")
+    funding_requested: Optional[float] = Field(default=None, description="Funding requested")
+    valuation: Optional[float] = Field(default=None, description="Valuation")
+    runway_months: Optional[float] = Field(default=None, description="Runway in months")
+    previous_funding: List[FundingRound] = Field(default_factory=list, description="Previous funding rounds")
+
+class CompanyResponse(BaseModel):
+    company_name: str = Field(default="", description="Company name")
+    problem_statement: str = Field(default="", description="Clear problem description")
+    solution_description: str = Field(default="", description="How they solve the problem")
+    competitors: List[str] = Field(default_factory=list, description="Competitors mentioned")
+    technology: List[str] = Field(default_factory=list, description="Technology stack")
+    business_model: str = Field(default="", description="B2B/B2C/Marketplace/etc")
+
+class CombinedExtractionResponse(BaseModel):
+    founders: List[FounderInfo] = Field(default_factory=list)
+    market: MarketResponse = Field(default_factory=MarketResponse)
+    traction: TractionResponse = Field(default_factory=TractionResponse)
+    financials: FinancialsResponse = Field(default_factory=FinancialsResponse)
+    company: CompanyResponse = Field(default_factory=CompanyResponse)
+
+# Fallback values used when a section cannot be extracted
+MARKET_DEFAULTS = {
+    "tam": None,
+    "sam": None,
+    "som": None,
+    "target_market": "",
+    "market_growth_rate": None
+}
+
+TRACTION_DEFAULTS = {
+    "mrr": None,
+    "arr": None,
+    "cac": None,
+    "ltv": None,
+    "churn_rate": None,
+    "user_count": None,
+    "growth_rate": None
+}
+
+FINANCIAL_DEFAULTS = {
+    "revenue": None,
+    "burn_rate": None,
+    "funding_requested": None,
+    "valuation": None,
+    "runway_months": None,
+    "previous_funding": []
+}
+
+COMPANY_DEFAULTS = {
+    "company_name": "",
+    "problem_statement": "",
+    "solution_description": "",
+    "competitors": [],
+    "technology": []
+}
+
+SECTION_DEFAULTS = {
+    "founders": [],
+    "market": MARKET_DEFAULTS,
+    "traction": TRACTION_DEFAULTS,
+    "financials": FINANCIAL_DEFAULTS,
+    "company": COMPANY_DEFAULTS
+}
+
+# Heading keywords used to route deck sections to the matching extractor
+SECTION_KEYWORDS = {
+    "founders": ("team", "founder", "leadership", "management"),
+    "market": ("market", "opportunity", "tam", "industry"),
+    "traction": ("traction", "metrics", "growth", "customers", "kpi"),
+    "financials": ("financial", "funding", "the ask", "use of funds", "revenue", "projections"),
+    "company": ("problem", "solution", "product", "competition", "competitor",
+                "technology", "overview", "business model")
+}
+
+# Short standalone lines such as "Team", "## Market Opportunity" or "3. Financials:"
+HEADING_PATTERN = re.compile(r"^\s*(?:#+\s*|\d+[.)]\s*)?([A-Za-z][A-Za-z &/'-]{1,40}?)\s*:?\s*$")
+
+def _segment_text(text: str) -> Dict[str, str]:
+    """Split deck text into per-section segments using slide headings"""
+    segments = {name: [] for name in SECTION_KEYWORDS}
+
+    # Text before the first recognised heading is usually the cover slide
+    current = ["company"]
+    for line in text.splitlines():
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1).split()) <= 5:
+            heading = match.group(1).lower()
+            matched = [
+                name for name, keywords in SECTION_KEYWORDS.items()
+                if any(keyword in heading for keyword in keywords)
+            ]
+            if matched:
+                current = matched
+
+        for name in current:
+            segments[name].append(line)
+
+    return {
+        name: "\n".join(lines) for name, lines in segments.items()
+        if any(line.strip() for line in lines)
+    }
+
+def _calculate_confidence(text: str) -> float:
+    """Calculate confidence score for extraction"""
+    # Simple confidence calculation based on text length and structure
+    words = text.split()
+    word_count = len(words)
+
+    # Basic heuristics for confidence
+    if word_count < 100:
+        return 0.3
+    elif word_count < 500:
+        return 0.6
+    elif word_count < 1000:
+        return 0.8
+    else:
+        return 0.9
+
 class LibrarianAgent:
     def __init__(self, project_id: str, region: str):
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        self.gemini_model = CachedGemini(get_gemini(project_id, region))
     
     async def extract_structured_data(self, cleaned_text: str) -> Dict[str, Any]:
         """Extract structured data from cleaned text"""
         
-        # Extract different sections sequentially for better accuracy
-        founders_data = await self._extract_founders(cleaned_text)
-        market_data = await self._extract_market_info(cleaned_text)
-        traction_data = await self._extract_traction_metrics(cleaned_text)
-        financial_data = await self._extract_financial_info(cleaned_text)
-        company_info = await self._extract_company_basics(cleaned_text)
+        # Extract every section with a single Gemini call
+        sections = await self._extract_all(cleaned_text)
+        
+        # Fall back to per-section extraction for anything the combined call missed
+        extractors = {
+            "founders": self._extract_founders,
+            "market": self._extract_market_info,
+            "traction": self._extract_traction_metrics,
+            "financials": self._extract_financial_info,
+            "company": self._extract_company_basics
+        }
+        missing = [name for name in extractors if name not in sections]
+        
+        # Send each extractor only the part of the deck relevant to it; the
+        # line-by-line heading scan runs in a worker process
+        segments = await run_cpu_bound(_segment_text, cleaned_text) if missing else {}
+        
+        results = await asyncio.gather(
+            *(extractors[name](segments.get(name, cleaned_text)) for name in missing),
+            return_exceptions=True
+        )
+        
+        # Substitute defaults for any section that failed
+        for name, result in zip(missing, results):
+            sections[name] = (
+                copy.deepcopy(SECTION_DEFAULTS[name])
+                if isinstance(result, Exception) else result
+            )
+        
+        founders_data = sections["founders"]
+        market_data = sections["market"]
+        traction_data = sections["traction"]
+        financial_data = sections["financials"]
+        company_info = sections["company"]
         
         # Combine all extracted data
         startup_profile = {
@@ -43,114 +230,85 @@ class LibrarianAgent:
             "financials": financial_data,
             "competitive_landscape": company_info.get("competitors", []),
             "technology_stack": company_info.get("technology", []),
-            "extraction_confidence": await self._calculate_confidence(cleaned_text)
+            "extraction_confidence": _calculate_confidence(cleaned_text)
         }
         
         return startup_profile
     
+    async def _extract_all(self, text: str) -> Dict[str, Any]:
+        """Extract all sections with one combined prompt"""
+        prompt = EXTRACTION_PROMPTS["combined"].substitute(text=text)
+        
+        try:
+            response = await self.gemini_model.generate_content_async(
+                prompt,
+                generation_config=json_generation_config(CombinedExtractionResponse),
+                validate=CombinedExtractionResponse.model_validate_json
+            )
+            combined_data = CombinedExtractionResponse.model_validate_json(response.text)
+        except ValueError:
+            return {}
+        
+        return combined_data.model_dump()
+    
     async def _extract_founders(self, text: str) -> List[Dict[str, Any]]:
         """Extract founder information"""
-        prompt = EXTRACTION_PROMPTS["founders"].format(text=text)
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+        prompt = EXTRACTION_PROMPTS["founders"].substitute(text=text)
         
         try:
-            founders_data = json.loads(response.text)
-            return founders_data.get("founders", [])
-        except json.JSONDecodeError:
-            # Fallback to regex extraction if JSON parsing fails
+            response = await self.gemini_model.generate_content_async(
+                prompt, generation_config=json_generation_config(FoundersResponse),
+                validate=FoundersResponse.model_validate_json
+            )
+            founders_data = FoundersResponse.model_validate_json(response.text)
+            return founders_data.model_dump()["founders"]
+        except ValueError:
+            # Fallback to regex extraction if the response does not match the schema
             return await self._fallback_founder_extraction(text)
     
     async def _extract_market_info(self, text: str) -> Dict[str, Any]:
         """Extract market size and opportunity information"""
-        prompt = EXTRACTION_PROMPTS["market"].format(text=text)
+        prompt = EXTRACTION_PROMPTS["market"].substitute(text=text)
         
-        response = await self.gemini_model.generate_content_async(prompt)
+        response = await self.gemini_model.generate_content_async(
+            prompt, generation_config=json_generation_config(MarketResponse),
+            validate=MarketResponse.model_validate_json
+        )
         
-        try:
-            market_data = json.loads(response.text)
-            return market_data
-        except json.JSONDecodeError:
-            return {
-                "tam": None,
-                "sam": None,
-                "som": None,
-                "target_market": "",
-                "market_growth_rate": None
-            }
+        return MarketResponse.model_validate_json(response.text).model_dump()
     
     async def _extract_traction_metrics(self, text: str) -> Dict[str, Any]:
         """Extract traction and growth metrics"""
-        prompt = EXTRACTION_PROMPTS["traction"].format(text=text)
+        prompt = EXTRACTION_PROMPTS["traction"].substitute(text=text)
         
-        response = await self.gemini_model.generate_content_async(prompt)
+        response = await self.gemini_model.generate_content_async(
+            prompt, generation_config=json_generation_config(TractionResponse),
+            validate=TractionResponse.model_validate_json
+        )
         
-        try:
-            traction_data = json.loads(response.text)
-            return traction_data
-        except json.JSONDecodeError:
-            return {
-                "mrr": None,
-                "arr": None,
-                "cac": None,
-                "ltv": None,
-                "churn_rate": None,
-                "user_count": None,
-                "growth_rate": None
-            }
+        return TractionResponse.model_validate_json(response.text).model_dump()
     
     async def _extract_financial_info(self, text: str) -> Dict[str, Any]:
         """Extract financial information"""
-        prompt = EXTRACTION_PROMPTS["financials"].format(text=text)
+        prompt = EXTRACTION_PROMPTS["financials"].substitute(text=text)
         
-        response = await self.gemini_model.generate_content_async(prompt)
+        response = await self.gemini_model.generate_content_async(
+            prompt, generation_config=json_generation_config(FinancialsResponse),
+            validate=FinancialsResponse.model_validate_json
+        )
         
-        try:
-            financial_data = json.loads(response.text)
-            return financial_data
-        except json.JSONDecodeError:
-            return {
-                "revenue": None,
-                "burn_rate": None,
-                "funding_requested": None,
-                "valuation": None,
-                "runway_months": None,
-                "previous_funding": []
-            }
+        return FinancialsResponse.model_validate_json(response.text).model_dump()
     
     async def _extract_company_basics(self, text: str) -> Dict[str, Any]:
         """Extract basic company information"""
-        prompt = EXTRACTION_PROMPTS["company_basics"].format(text=text)
+        prompt = EXTRACTION_PROMPTS["company_basics"].substitute(text=text)
         
-        response = await self.gemini_model.generate_content_async(prompt)
+        response = await self.gemini_model.generate_content_async(
+            prompt, generation_config=json_generation_config(CompanyResponse),
+            validate=CompanyResponse.model_validate_json
+        )
         
-        try:
-            company_data = json.loads(response.text)
-            return company_data
-        except json.JSONDecodeError:
-            return {
-                "company_name": "",
-                "problem_statement": "",
-                "solution_description": "",
-                "competitors": [],
-                "technology": []
-            }
-    
-    async def _calculate_confidence(self, text: str) -> float:
-        """Calculate confidence score for extraction"""
-        # Simple confidence calculation based on text length and structure
-        words = text.split()
-        word_count = len(words)
-        
-        # Basic heuristics for confidence
-        if word_count < 100:
-            return 0.3
-        elif word_count < 500:
-            return 0.6
-        elif word_count < 1000:
-            return 0.8
-        else:
-            return 0.9
+        return CompanyResponse.model_validate_json(response.text).model_dump()
     
     async def _fallback_founder_extraction(self, text: str) -> List[Dict[str, Any]]:
         """Fallback method for founder extraction using simpler parsing"""
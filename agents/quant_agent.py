@@ -1,30 +1,68 @@
 # agents/quant_agent.py
+import asyncio
+import json
 import pandas as pd
-from typing import Dict, Any, List
+from string import Template
+from typing import Dict, Any, List, Iterable
+from cachetools import TTLCache
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
 import numpy as np
-import vertexai
-from vertexai.generative_models import GenerativeModel
+from agents._gemini import get_gemini
+from infrastructure.llm_cache import CachedGemini
+from utils.serialization import jdumps, jloads
+from data.prompts.analysis_prompts import ANALYSIS_PROMPTS
+
+# Known values produced by _determine_stage / _determine_sector
+STAGES = ("pre_seed", "seed", "series_a", "series_b", "growth")
+SECTORS = ("b2b_saas",)
+
+# Percentile reported for values at or below p25, p50, p75, p90, and above p90
+PERCENTILE_BUCKETS = np.array([25, 50, 75, 90, 95])
+
+# Per-startup data block; the static instructions live in ANALYSIS_PROMPTS
+_QUANT_TMPL = Template("""
+        Startup Profile:
+        $traction_metrics
+        $financials
+        
+        Percentile Rankings:
+        $rankings
+        """)
 
 class QuantAgent:
     def __init__(self, project_id: str, region: str, bq_client: bigquery.Client):
         self.project_id = project_id
         self.bq_client = bq_client
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        
+        # Storage Read API client streams query results as Arrow record batches
+        self.bqstorage_client = bigquery_storage.BigQueryReadClient()
+        
+        # Benchmark rows keyed by (sector, stage)
+        self._benchmark_cache = TTLCache(maxsize=1024, ttl=3600)
+        # Stage and sector keyed by the profile fields they are derived from
+        self._derived_cache = TTLCache(maxsize=1024, ttl=3600)
+        self.gemini_model = CachedGemini(
+            get_gemini(
+                project_id, region,
+                system_instruction=ANALYSIS_PROMPTS["quantitative_analysis"]
+            ),
+            model_name="gemini-1.5-pro/quantitative_analysis"
+        )
     
     async def benchmark_startup(self, enriched_profile: Dict[str, Any]) -> Dict[str, Any]:
         """Benchmark startup against historical data"""
         
-        # Determine startup stage and sector
-        stage = self._determine_stage(enriched_profile)
-        sector = self._determine_sector(enriched_profile)
+        # Determine startup stage and sector (memoized per profile content)
+        derived = self._derived(enriched_profile)
+        stage = derived["stage"]
+        sector = derived["sector"]
         
         # Get benchmark data from BigQuery
         benchmark_data = await self._get_benchmark_data(sector, stage)
         
         # Calculate percentile rankings
-        metrics_benchmarks = await self._calculate_percentile_rankings(
+        metrics_benchmarks = self._calculate_percentile_rankings(
             enriched_profile, benchmark_data
         )
         
@@ -39,9 +77,31 @@ class QuantAgent:
             "benchmark_data": benchmark_data,
             "percentile_rankings": metrics_benchmarks,
             "quantitative_analysis": quant_analysis,
-            "overall_score": await self._calculate_overall_score(metrics_benchmarks)
+            "overall_score": self._calculate_overall_score(metrics_benchmarks)
         }
     
+    def _derived(self, profile: Dict[str, Any]) -> Dict[str, str]:
+        """Return stage and sector, computing them once per profile
+        
+        The memo lives on the agent rather than the profile, so the caller's
+        dict (which may be cached or persisted) is never modified.
+        """
+        financials = profile.get("financials", {})
+        key = (
+            financials.get("revenue"),
+            financials.get("funding_requested"),
+            profile.get("problem_statement", ""),
+            profile.get("solution_description", "")
+        )
+        derived = self._derived_cache.get(key)
+        if derived is None:
+            derived = {
+                "stage": self._determine_stage(profile),
+                "sector": self._determine_sector(profile)
+            }
+            self._derived_cache[key] = derived
+        return derived
+    
     def _determine_stage(self, profile: Dict[str, Any]) -> str:
         """Determine startup stage based on metrics"""
         financials = profile.get("financials", {})
@@ -70,8 +130,50 @@ class QuantAgent:
         # For now, return a default - in production, use Gemini classification
         return "b2b_saas"
     
+    async def prefetch_benchmarks(self, sectors: Iterable[str] = SECTORS,
+                                  stages: Iterable[str] = STAGES) -> None:
+        """Warm the benchmark cache for every sector/stage pair with one query"""
+        sectors, stages = list(sectors), list(stages)
+        query = f"""
+        SELECT 
+            sector, stage, metric_name,
+            p25, p50, p75, p90
+        FROM `{self.project_id}.athena_data.benchmark_data`
+        WHERE sector IN UNNEST(@sectors) AND stage IN UNNEST(@stages)
+        """
+        
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("sectors", "STRING", sectors),
+                bigquery.ArrayQueryParameter("stages", "STRING", stages),
+            ]
+        )
+        
+        columns = await self._run_query(query, job_config)
+        
+        prefetched = {(sector, stage): {} for sector in sectors for stage in stages}
+        for sector, stage, metric_name, p25, p50, p75, p90 in zip(
+            columns["sector"], columns["stage"], columns["metric_name"],
+            columns["p25"], columns["p50"], columns["p75"], columns["p90"]
+        ):
+            prefetched.setdefault((sector, stage), {})[metric_name] = {
+                "p25": p25,
+                "p50": p50,
+                "p75": p75,
+                "p90": p90
+            }
+        
+        for (sector, stage), benchmark_data in prefetched.items():
+            if not benchmark_data:
+                benchmark_data = self._get_default_benchmarks(sector, stage)
+            self._benchmark_cache[(sector, stage)] = benchmark_data
+    
     async def _get_benchmark_data(self, sector: str, stage: str) -> Dict[str, Any]:
         """Get benchmark data from BigQuery"""
+        cached = self._benchmark_cache.get((sector, stage))
+        if cached is not None:
+            return cached
+        
         query = f"""
         SELECT 
             metric_name,
@@ -87,24 +189,38 @@ class QuantAgent:
             ]
         )
         
-        query_job = self.bq_client.query(query, job_config=job_config)
-        results = query_job.result()
+        columns = await self._run_query(query, job_config)
         
         benchmark_data = {}
-        for row in results:
-            benchmark_data[row.metric_name] = {
-                "p25": row.p25,
-                "p50": row.p50,
-                "p75": row.p75,
-                "p90": row.p90
+        for metric_name, p25, p50, p75, p90 in zip(
+            columns["metric_name"], columns["p25"], columns["p50"],
+            columns["p75"], columns["p90"]
+        ):
+            benchmark_data[metric_name] = {
+                "p25": p25,
+                "p50": p50,
+                "p75": p75,
+                "p90": p90
             }
         
         # If no data found, use default benchmarks
         if not benchmark_data:
             benchmark_data = self._get_default_benchmarks(sector, stage)
         
+        self._benchmark_cache[(sector, stage)] = benchmark_data
         return benchmark_data
     
+    async def _run_query(self, query: str, job_config: bigquery.QueryJobConfig) -> Dict[str, List[Any]]:
+        """Run a BigQuery query off the event loop and return its columns"""
+        loop = asyncio.get_running_loop()
+        table = await loop.run_in_executor(
+            None,
+            lambda: self.bq_client.query(query, job_config=job_config).to_arrow(
+                bqstorage_client=self.bqstorage_client
+            )
+        )
+        return table.to_pydict()
+    
     def _get_default_benchmarks(self, sector: str, stage: str) -> Dict[str, Any]:
         """Default benchmarks for when no data is available"""
         if stage == "seed" and sector == "b2b_saas":
@@ -116,8 +232,8 @@ class QuantAgent:
             }
         return {}
     
-    async def _calculate_percentile_rankings(self, profile: Dict[str, Any], 
-                                           benchmarks: Dict[str, Any]) -> Dict[str, Any]:
+    def _calculate_percentile_rankings(self, profile: Dict[str, Any], 
+                                     benchmarks: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate percentile rankings for each metric"""
         rankings = {}
         
@@ -132,15 +248,25 @@ class QuantAgent:
             "burn_multiple": self._calculate_burn_multiple(financials, traction)
         }
         
-        # Calculate percentile for each metric
-        for metric_name, value in metrics.items():
-            if value is not None and metric_name in benchmarks:
-                percentile = self._calculate_percentile(value, benchmarks[metric_name])
-                rankings[metric_name] = {
-                    "value": value,
-                    "percentile": percentile,
-                    "benchmark": benchmarks[metric_name]
-                }
+        ranked = [
+            metric_name for metric_name, value in metrics.items()
+            if value is not None and metric_name in benchmarks
+        ]
+        if not ranked:
+            return rankings
+        
+        # Calculate percentiles for all metrics in one pass
+        percentiles = self._calculate_percentiles(
+            [metrics[metric_name] for metric_name in ranked],
+            [benchmarks[metric_name] for metric_name in ranked]
+        )
+        
+        for metric_name, percentile in zip(ranked, percentiles):
+            rankings[metric_name] = {
+                "value": metrics[metric_name],
+                "percentile": percentile,
+                "benchmark": benchmarks[metric_name]
+            }
         
         return rankings
     
@@ -170,46 +296,33 @@ class QuantAgent:
             return burn_rate / arr_growth
         return None
     
-    def _calculate_percentile(self, value: float, benchmark: Dict[str, float]) -> float:
-        """Calculate percentile ranking against benchmark"""
-        if value <= benchmark["p25"]:
-            return 25
-        elif value <= benchmark["p50"]:
-            return 50
-        elif value <= benchmark["p75"]:
-            return 75
-        elif value <= benchmark["p90"]:
-            return 90
-        else:
-            return 95
+    def _calculate_percentiles(self, values: List[float],
+                               benchmarks: List[Dict[str, float]]) -> List[int]:
+        """Calculate percentile rankings for many values against their benchmarks"""
+        vals = np.asarray(values, dtype=float)
+        breakpoints = np.array(
+            [[b["p25"], b["p50"], b["p75"], b["p90"]] for b in benchmarks],
+            dtype=float
+        )
+        
+        # Rank is the first breakpoint the value does not exceed, or the top bucket
+        within = vals[:, None] <= breakpoints
+        bucket = np.where(within.any(axis=1), within.argmax(axis=1), len(PERCENTILE_BUCKETS) - 1)
+        
+        return PERCENTILE_BUCKETS[bucket].tolist()
     
     async def _generate_quantitative_analysis(self, profile: Dict[str, Any], 
                                             rankings: Dict[str, Any]) -> Dict[str, Any]:
         """Generate quantitative analysis using Gemini"""
-        prompt = f"""
-        Analyze the following startup metrics and benchmarking data:
-        
-        Startup Profile:
-        {json.dumps(profile.get("traction_metrics", {}), indent=2)}
-        {json.dumps(profile.get("financials", {}), indent=2)}
-        
-        Percentile Rankings:
-        {json.dumps(rankings, indent=2)}
-        
-        Provide analysis on:
-        - Overall financial health
-        - Growth trajectory assessment
-        - Unit economics analysis
-        - Risk factors from metrics
-        - Recommendations for improvement
-        
-        Return as JSON with clear recommendations.
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+        prompt = _QUANT_TMPL.substitute(
+            traction_metrics=jdumps(profile.get("traction_metrics", {})),
+            financials=jdumps(profile.get("financials", {})),
+            rankings=jdumps(rankings)
+        )
         
         try:
-            return json.loads(response.text)
+            response = await self.gemini_model.generate_content_async(prompt, validate=jloads)
+            return jloads(response.text)
         except json.JSONDecodeError:
             return {
                 "financial_health": "needs_analysis",
@@ -217,7 +330,7 @@ class QuantAgent:
                 "recommendations": []
             }
     
-    async def _calculate_overall_score(self, rankings: Dict[str, Any]) -> float:
+    def _calculate_overall_score(self, rankings: Dict[str, Any]) -> float:
         """Calculate overall quantitative score"""
         if not rankings:
             return 0.5
@@ -1,14 +1,73 @@
 # agents/scout_agent.py
 import aiohttp
 import asyncio
-from typing import Dict, Any, List
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import os
+from datetime import UTC, datetime
+from string import Template
+from typing import Dict, Any, List, Optional
+from agents._gemini import entity_scope, gemini_json, get_gemini
+from infrastructure.async_cache import async_lru_ttl
+from infrastructure.llm_cache import CachedGemini, get_semantic_cache
+from infrastructure.retries import resilient
+from pydantic import BaseModel, Field
+from utils.serialization import jdumps, jloads
+
+_VERIFY_CLAIMS_TMPL = Template("""
+        Verify the following founder claims against their LinkedIn profile data:
+        
+        Founder Claims:
+        $founder_data
+        
+        LinkedIn Data:
+        $linkedin_data
+        
+        Return a JSON object with:
+        - "verification_score": float between 0-1
+        - "verified_claims": list of verified claims
+        - "discrepancies": list of discrepancies found
+        - "confidence": float between 0-1
+        """)
+
+_LANDSCAPE_TMPL = Template("""
+        Analyze the competitive landscape based on the following competitor data:
+        
+        $competitors
+        
+        Provide analysis on:
+        - Market saturation level
+        - Funding trends in the space
+        - Key differentiators needed
+        - Market opportunity assessment
+        
+        Return as JSON.
+        """)
+
+def _name_key(agent: "ScoutAgent", name: str) -> str:
+    """Lookups are keyed case-insensitively on the founder or company name"""
+    return name.lower()
+
+class VerificationResult(BaseModel):
+    verification_score: float = Field(default=0.5, description="Float between 0-1")
+    verified_claims: List[str] = Field(default_factory=list, description="Verified claims")
+    discrepancies: List[str] = Field(default_factory=list, description="Discrepancies found")
+    confidence: float = Field(default=0.5, description="Float between 0-1")
+
+class CompetitiveLandscape(BaseModel):
+    market_saturation: str = Field(default="medium", description="Market saturation level")
+    funding_trends: str = Field(default="positive", description="Funding trends in the space")
+    key_differentiators: List[str] = Field(default_factory=list, description="Key differentiators needed")
+    market_opportunity: str = Field(default="", description="Market opportunity assessment")
 
 class ScoutAgent:
     def __init__(self, project_id: str, region: str):
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        self.gemini_model = CachedGemini(
+            get_gemini(project_id, region), semantic_cache=get_semantic_cache()
+        )
+        
+        # Enrichment API calls share one pooled session, opened on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._http_sem = asyncio.Semaphore(int(os.getenv("SCOUT_HTTP_MAX_CONCURRENCY", "32")))
+        self._github_token = os.getenv("GITHUB_TOKEN")
         
         # API configurations (you'll need to get these API keys)
         self.apis = {
@@ -22,10 +81,35 @@ class ScoutAgent:
             },
             "github": {
                 "base_url": "https://api.github.com",
-                "headers": {"Authorization": "token YOUR_GITHUB_TOKEN"}
+                "headers": {"Authorization": f"token {self._github_token}"}
             }
         }
     
+    def _http_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, opening it on the running loop if needed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=16, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    @resilient
+    async def _api_get(self, api: str, path: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """GET a JSON resource from one of the configured enrichment APIs"""
+        config = self.apis[api]
+        async with self._http_sem, self._http_session().get(
+            config["base_url"] + path, headers=config["headers"], params=params
+        ) as response:
+            response.raise_for_status()
+            return await response.json(loads=jloads)
+    
     async def enrich_startup_data(self, startup_profile: Dict[str, Any]) -> Dict[str, Any]:
         """Enrich startup data with external sources"""
         
@@ -53,22 +137,29 @@ class ScoutAgent:
     
     async def _verify_founder_credentials(self, founders: List[Dict]) -> Dict[str, Any]:
         """Verify founder backgrounds using LinkedIn and other sources"""
-        verification_results = {}
-        
-        for founder in founders:
-            founder_name = founder.get("name", "")
-            if not founder_name:
-                continue
-                
-            # Search LinkedIn for verification
-            linkedin_data = await self._search_linkedin_profile(founder_name)
-            
-            # Verify claims against LinkedIn data
-            verification = await self._verify_founder_claims(founder, linkedin_data)
-            verification_results[founder_name] = verification
-        
-        return verification_results
+        named_founders = [founder for founder in founders if founder.get("name")]
+        
+        # Founders are independent, so verify them concurrently
+        results = await asyncio.gather(
+            *(self._verify_one(founder) for founder in named_founders),
+            return_exceptions=True
+        )
+        
+        return {
+            founder["name"]: verification
+            for founder, verification in zip(named_founders, results)
+            if not isinstance(verification, Exception)
+        }
+    
+    async def _verify_one(self, founder: Dict) -> Dict[str, Any]:
+        """Verify a single founder's claims"""
+        # Search LinkedIn for verification
+        linkedin_data = await self._search_linkedin_profile(founder["name"])
+        
+        # Verify claims against LinkedIn data
+        return await self._verify_founder_claims(founder, linkedin_data)
     
+    @async_lru_ttl(maxsize=4096, ttl=3600, key=_name_key)
     async def _search_linkedin_profile(self, founder_name: str) -> Dict[str, Any]:
         """Search for LinkedIn profile (mock implementation)"""
         # In production, you'd use LinkedIn API or web scraping
@@ -82,27 +173,17 @@ class ScoutAgent:
     
     async def _verify_founder_claims(self, founder_data: Dict, linkedin_data: Dict) -> Dict[str, Any]:
         """Use Gemini to verify founder claims against LinkedIn data"""
-        prompt = f"""
-        Verify the following founder claims against their LinkedIn profile data:
-        
-        Founder Claims:
-        {json.dumps(founder_data, indent=2)}
-        
-        LinkedIn Data:
-        {json.dumps(linkedin_data, indent=2)}
-        
-        Return a JSON object with:
-        - "verification_score": float between 0-1
-        - "verified_claims": list of verified claims
-        - "discrepancies": list of discrepancies found
-        - "confidence": float between 0-1
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+        prompt = _VERIFY_CLAIMS_TMPL.substitute(
+            founder_data=jdumps(founder_data), linkedin_data=jdumps(linkedin_data)
+        )
         
         try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
+            verification = await gemini_json(
+                self.gemini_model, prompt, VerificationResult,
+                semantic_scope=entity_scope("founder", founder_data.get("name"))
+            )
+            return verification.model_dump()
+        except ValueError:
             return {"verification_score": 0.5, "verified_claims": [], "discrepancies": []}
     
     async def _get_competitor_analysis(self, company_name: str) -> Dict[str, Any]:
@@ -112,7 +193,7 @@ class ScoutAgent:
         similar_companies = await self._search_crunchbase_competitors(company_name)
         
         # Analyze competitive landscape
-        competitive_analysis = await self._analyze_competitive_landscape(similar_companies)
+        competitive_analysis = await self._analyze_competitive_landscape(company_name, similar_companies)
         
         return {
             "similar_companies": similar_companies,
@@ -120,6 +201,7 @@ class ScoutAgent:
             "market_position": await self._assess_market_position(company_name, similar_companies)
         }
     
+    @async_lru_ttl(maxsize=4096, ttl=3600, key=_name_key)
     async def _search_crunchbase_competitors(self, company_name: str) -> List[Dict]:
         """Search Crunchbase for competitor data"""
         # Mock implementation - in production use actual Crunchbase API
@@ -132,27 +214,18 @@ class ScoutAgent:
             }
         ]
     
-    async def _analyze_competitive_landscape(self, competitors: List[Dict]) -> Dict[str, Any]:
+    async def _analyze_competitive_landscape(self, company_name: str,
+                                             competitors: List[Dict]) -> Dict[str, Any]:
         """Analyze competitive landscape using Gemini"""
-        prompt = f"""
-        Analyze the competitive landscape based on the following competitor data:
-        
-        {json.dumps(competitors, indent=2)}
-        
-        Provide analysis on:
-        - Market saturation level
-        - Funding trends in the space
-        - Key differentiators needed
-        - Market opportunity assessment
-        
-        Return as JSON.
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+        prompt = _LANDSCAPE_TMPL.substitute(competitors=jdumps(competitors))
         
         try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
+            landscape = await gemini_json(
+                self.gemini_model, prompt, CompetitiveLandscape,
+                semantic_scope=entity_scope("company", company_name)
+            )
+            return landscape.model_dump()
+        except ValueError:
             return {"market_saturation": "medium", "funding_trends": "positive"}
     
     async def _check_market_validation(self, market_data: Dict) -> Dict[str, Any]:
@@ -166,13 +239,35 @@ class ScoutAgent:
     
     async def _analyze_technology_trends(self, tech_stack: List[str]) -> Dict[str, Any]:
         """Analyze technology stack trends"""
-        # Use GitHub API to check technology popularity, Stack Overflow trends
-        return {
+        analysis = {
             "technology_maturity": "established",
             "adoption_trends": "growing",
             "technical_risk_score": 0.3
         }
+        
+        # Popularity comes from GitHub when a token is configured
+        if self._github_token and tech_stack:
+            counts = await asyncio.gather(
+                *(self._github_repository_count(technology) for technology in tech_stack),
+                return_exceptions=True
+            )
+            analysis["github_repository_counts"] = {
+                technology: count
+                for technology, count in zip(tech_stack, counts)
+                if not isinstance(count, Exception)
+            }
+        return analysis
+    
+    @async_lru_ttl(maxsize=4096, ttl=3600, key=_name_key)
+    async def _github_repository_count(self, technology: str) -> int:
+        """Count public GitHub repositories tagged with the technology's topic"""
+        topic = technology.strip().lower().replace(" ", "-")
+        result = await self._api_get(
+            "github", "/search/repositories", {"q": f"topic:{topic}", "per_page": 1}
+        )
+        return result["total_count"]
     
+    @async_lru_ttl(maxsize=4096, ttl=3600, key=_name_key)
     async def _get_news_sentiment(self, company_name: str) -> Dict[str, Any]:
         """Get news sentiment analysis"""
         # In production, integrate with news APIs
@@ -192,5 +287,4 @@ class ScoutAgent:
     
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
-        return datetime.utcnow().isoformat()
+        return datetime.now(UTC).isoformat(timespec="seconds")
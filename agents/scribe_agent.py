@@ -1,33 +1,80 @@
 # agents/scribe_agent.py
+import asyncio
 import io
+import os
+import tempfile
+import uuid
 import base64
 from typing import List, Dict, Any
+import aiofiles
 from google.cloud import vision
 from google.cloud import speech
-from google.cloud import storage
-import vertexai
-from vertexai.generative_models import GenerativeModel
+from agents._gemini import get_gemini
+from infrastructure.llm_cache import CachedGemini
+from infrastructure.retries import resilient
+from utils.cpu_pool import run_cpu_bound
+from utils.gcp_clients import get_speech_client, get_storage_client, get_vision_client
 import PyPDF2
+from pdf2image import convert_from_path
+
+# Pages per Gemini cleaning request, keeping each prompt well under the context limit
+CLEAN_CHUNK_PAGES = 8
+
+# Vision accepts at most 16 images per batch_annotate_images call
+VISION_BATCH_SIZE = 16
+
+# PyPDF2 is pure Python and CPU-bound, so page extraction runs in worker processes
+def _extract_all_pages(file_path: str) -> List[str]:
+    """Extract the text of every page; top-level so it can run in the process pool"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [page.extract_text() for page in pdf_reader.pages]
+
+# Audio above this size is transcribed from GCS with long-running recognition
+LONG_AUDIO_BYTES = 1024 * 1024
+
+AUDIO_TYPES = ('mp3', 'wav', 'm4a')
 
 class ScribeAgent:
     def __init__(self, project_id: str, region: str):
         self.project_id = project_id
         self.region = region
-        self.vision_client = vision.ImageAnnotatorClient()
-        self.speech_client = speech.SpeechClient()
-        self.storage_client = storage.Client(project=project_id)
+        self.speech_client = get_speech_client()
+        self.storage_client = get_storage_client(project_id)
+        self.upload_bucket = os.getenv("SCRIBE_UPLOAD_BUCKET", f"{project_id}-scribe-uploads")
         
         # Initialize Gemini
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        self.gemini_model = CachedGemini(get_gemini(project_id, region))
+        
+        self._vision_sem = asyncio.Semaphore(int(os.getenv("VISION_MAX_CONCURRENCY", "4")))
+    
+    @property
+    def vision_client(self):
+        # Created lazily so the async gRPC channel binds to the serving event loop
+        return get_vision_client()
     
     async def process_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
-        """Process different document types"""
+        """Process different document types from a local path or gs:// URI"""
+        if not file_path.startswith("gs://"):
+            return await self._process_local_document(file_path, file_type)
+        
+        # Speech-to-Text reads the object in place, so audio is never downloaded
+        if file_type.lower() in AUDIO_TYPES:
+            return await self._process_audio(file_path)
+        
+        local_path = await self._download_from_gcs(file_path)
+        try:
+            return await self._process_local_document(local_path, file_type)
+        finally:
+            os.remove(local_path)
+    
+    async def _process_local_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """Dispatch a local file to the matching processor"""
         if file_type.lower() == 'pdf':
             return await self._process_pdf(file_path)
         elif file_type.lower() in ['jpg', 'jpeg', 'png']:
             return await self._process_image(file_path)
-        elif file_type.lower() in ['mp3', 'wav', 'm4a']:
+        elif file_type.lower() in AUDIO_TYPES:
             return await self._process_audio(file_path)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
@@ -38,12 +85,8 @@ class ScribeAgent:
         
         # Try text extraction first
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text()
-                    if text.strip():
-                        extracted_text.append(text)
+            text_pages = await run_cpu_bound(_extract_all_pages, file_path)
+            extracted_text = [text for text in text_pages if text.strip()]
         except Exception as e:
             print(f"Text extraction failed: {e}")
         
@@ -53,7 +96,7 @@ class ScribeAgent:
         
         # Use Gemini to clean and structure the text
         combined_text = "\n".join(extracted_text)
-        cleaned_text = await self._clean_text_with_gemini(combined_text)
+        cleaned_text = await self._clean_pages_with_gemini(extracted_text)
         
         return {
             "content_type": "document",
@@ -64,29 +107,52 @@ class ScribeAgent:
     
     async def _ocr_pdf(self, file_path: str) -> List[str]:
         """Use Cloud Vision API for OCR"""
-        # Convert PDF to images and process with Vision API
-        # This is a simplified version - you'd need pdf2image for production
-        with open(file_path, "rb") as image_file:
-            content = image_file.read()
+        pages = await asyncio.to_thread(convert_from_path, file_path, dpi=200, thread_count=4)
+        
+        page_images = []
+        for page in pages:
+            buffer = io.BytesIO()
+            page.save(buffer, format="PNG")
+            page_images.append(buffer.getvalue())
+        
+        texts = await self._detect_text(page_images)
+        return [text for text in texts if text.strip()]
+    
+    async def _detect_text(self, images: List[bytes]) -> List[str]:
+        """OCR images with batched async Vision requests, one result per image"""
+        batches = [
+            images[start:start + VISION_BATCH_SIZE]
+            for start in range(0, len(images), VISION_BATCH_SIZE)
+        ]
+        batch_texts = await asyncio.gather(*(self._detect_text_batch(batch) for batch in batches))
+        return [text for texts in batch_texts for text in texts]
+    
+    @resilient
+    async def _detect_text_batch(self, images: List[bytes]) -> List[str]:
+        """Send up to VISION_BATCH_SIZE images in a single RPC"""
+        requests = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=[vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)]
+            )
+            for content in images
+        ]
         
-        image = vision.Image(content=content)
-        response = self.vision_client.text_detection(image=image)
-        texts = response.text_annotations
+        async with self._vision_sem:
+            response = await self.vision_client.batch_annotate_images(requests=requests)
         
-        if texts:
-            return [texts[0].description]
-        return []
+        return [
+            result.text_annotations[0].description if result.text_annotations else ""
+            for result in response.responses
+        ]
     
     async def _process_image(self, file_path: str) -> Dict[str, Any]:
         """Process image with OCR"""
-        with open(file_path, "rb") as image_file:
-            content = image_file.read()
+        content = await self._read_file(file_path)
         
-        image = vision.Image(content=content)
-        response = self.vision_client.text_detection(image=image)
+        extracted_text = (await self._detect_text([content]))[0]
         
-        if response.text_annotations:
-            extracted_text = response.text_annotations[0].description
+        if extracted_text:
             cleaned_text = await self._clean_text_with_gemini(extracted_text)
             
             return {
@@ -98,11 +164,7 @@ class ScribeAgent:
         return {"content_type": "image", "raw_text": "", "cleaned_text": ""}
     
     async def _process_audio(self, file_path: str) -> Dict[str, Any]:
-        """Process audio with Speech-to-Text"""
-        with open(file_path, "rb") as audio_file:
-            content = audio_file.read()
-        
-        audio = speech.RecognitionAudio(content=content)
+        """Process audio from a local path or gs:// URI with Speech-to-Text"""
         config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
             sample_rate_hertz=16000,
@@ -112,7 +174,20 @@ class ScribeAgent:
             enable_automatic_punctuation=True
         )
         
-        response = self.speech_client.recognize(config=config, audio=audio)
+        if file_path.startswith("gs://"):
+            audio = speech.RecognitionAudio(uri=file_path)
+            response = await self._long_running_recognize(config, audio)
+        elif os.path.getsize(file_path) > LONG_AUDIO_BYTES:
+            # Large recordings go through a temporary GCS object instead of an inline payload
+            audio_uri = await self._upload_to_gcs(file_path)
+            try:
+                audio = speech.RecognitionAudio(uri=audio_uri)
+                response = await self._long_running_recognize(config, audio)
+            finally:
+                await self._delete_from_gcs(audio_uri)
+        else:
+            audio = speech.RecognitionAudio(content=await self._read_file(file_path))
+            response = await self._recognize(config, audio)
         
         transcript_parts = []
         for result in response.results:
@@ -128,6 +203,61 @@ class ScribeAgent:
             "speaker_info": self._extract_speaker_info(response)
         }
     
+    @resilient
+    async def _recognize(self, config: speech.RecognitionConfig, audio: speech.RecognitionAudio):
+        """Synchronous recognition for short clips"""
+        return await asyncio.to_thread(self.speech_client.recognize, config=config, audio=audio)
+    
+    @resilient
+    async def _long_running_recognize(self, config: speech.RecognitionConfig,
+                                      audio: speech.RecognitionAudio):
+        """Long-running recognition, waiting on the operation off the event loop"""
+        operation = await asyncio.to_thread(
+            self.speech_client.long_running_recognize, config=config, audio=audio
+        )
+        return await asyncio.to_thread(operation.result)
+    
+    async def _read_file(self, file_path: str) -> bytes:
+        """Read a file without blocking the event loop"""
+        async with aiofiles.open(file_path, "rb") as file:
+            return await file.read()
+    
+    async def _download_from_gcs(self, gcs_uri: str) -> str:
+        """Download a gs:// object to a temporary file in 8 MiB chunks and return its path"""
+        bucket_name, blob_name = gcs_uri[len("gs://"):].split("/", 1)
+        blob = self.storage_client.bucket(bucket_name).blob(blob_name, chunk_size=8 * 1024 * 1024)
+        
+        fd, local_path = tempfile.mkstemp(suffix=os.path.splitext(blob_name)[1])
+        os.close(fd)
+        await asyncio.to_thread(blob.download_to_filename, local_path)
+        return local_path
+    
+    async def _upload_to_gcs(self, file_path: str) -> str:
+        """Upload a local file to the scribe bucket and return its gs:// URI"""
+        blob_name = f"audio/{uuid.uuid4().hex}/{os.path.basename(file_path)}"
+        blob = self.storage_client.bucket(self.upload_bucket).blob(blob_name)
+        await asyncio.to_thread(blob.upload_from_filename, file_path)
+        return f"gs://{self.upload_bucket}/{blob_name}"
+    
+    async def _delete_from_gcs(self, gcs_uri: str):
+        """Delete a temporary gs:// object, reporting rather than raising failures"""
+        bucket_name, blob_name = gcs_uri[len("gs://"):].split("/", 1)
+        try:
+            await asyncio.to_thread(self.storage_client.bucket(bucket_name).blob(blob_name).delete)
+        except Exception as e:
+            print(f"Failed to delete {gcs_uri}: {e}")
+    
+    async def _clean_pages_with_gemini(self, pages: List[str]) -> str:
+        """Clean page text in fixed-size chunks concurrently"""
+        chunks = [
+            "\n".join(pages[start:start + CLEAN_CHUNK_PAGES])
+            for start in range(0, len(pages), CLEAN_CHUNK_PAGES)
+        ]
+        cleaned_chunks = await asyncio.gather(
+            *(self._clean_text_with_gemini(chunk) for chunk in chunks)
+        )
+        return "\n".join(cleaned_chunks)
+    
     async def _clean_text_with_gemini(self, text: str) -> str:
         """Use Gemini to clean and structure extracted text"""
         prompt = f"""
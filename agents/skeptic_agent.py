@@ -1,13 +1,116 @@
 # agents/skeptic_agent.py
-from typing import Dict, Any, List
-import vertexai
-from vertexai.generative_models import GenerativeModel
-import json
+from string import Template
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from agents._gemini import entity_scope, gemini_json, get_gemini
+from infrastructure.llm_cache import CachedGemini, get_semantic_cache
+from pydantic import BaseModel, Field
+from utils.serialization import jdumps
+
+class RiskSection(BaseModel):
+    risk_score: float = Field(default=0.5, description="0-1 (1 being highest risk)")
+    risk_factors: List[str] = Field(default_factory=list, description="Identified risks")
+    strengths: List[str] = Field(default_factory=list, description="Strengths")
+    recommendations: List[str] = Field(default_factory=list, description="Suggested improvements")
+
+class QualitativeRisks(BaseModel):
+    team_risks: RiskSection = Field(description="Team risk analysis")
+    market_risks: RiskSection = Field(description="Market risk analysis")
+
+# Shared profile context followed by per-category instructions
+_QUALITATIVE_RISK_TMPL = Template("""
+        Analyze the team and market risks for this startup based on the following data.
+        
+        <SHARED_CONTEXT>
+        Founders:
+        $founders
+        
+        Founder Verification:
+        $founder_verification
+        
+        Market Data:
+        $market_data
+        
+        Competitive Analysis:
+        $competitor_analysis
+        
+        Problem/Solution:
+        Problem: $problem_statement
+        Solution: $solution_description
+        </SHARED_CONTEXT>
+        
+        <TEAM>
+        Identify risks related to:
+        - Experience gaps in key areas
+        - Co-founder dynamics and complementarity
+        - Previous startup experience
+        - Domain expertise
+        - Team completeness
+        - Key person dependency
+        </TEAM>
+        
+        <MARKET>
+        Assess risks related to:
+        - Market size and growth potential
+        - Market timing
+        - Customer acquisition challenges
+        - Market saturation
+        - Regulatory risks
+        - Economic sensitivity
+        </MARKET>
+        
+        Return a JSON object with keys "team_risks" and "market_risks", each containing:
+        - "risk_score": 0-1 (1 being highest risk)
+        - "risk_factors": list of identified risks
+        - "strengths": list of strengths
+        - "recommendations": suggested improvements
+        """)
+
+# Fallbacks for the Gemini-assessed categories when the response is unusable
+TEAM_RISK_DEFAULT = {
+    "risk_score": 0.5,
+    "risk_factors": ["Unable to analyze team risks"],
+    "strengths": [],
+    "recommendations": []
+}
+MARKET_RISK_DEFAULT = {"risk_score": 0.5, "risk_factors": [], "strengths": []}
+
+# Financial risk rules, evaluated over columns [runway, ltv, cac, churn, revenue]
+FINANCIAL_RISK_FACTORS = (
+    "Short runway - less than 12 months",
+    "Poor unit economics - LTV/CAC ratio below 3",
+    "High churn rate",
+    "No revenue generated yet"
+)
+FINANCIAL_RISK_WEIGHTS = np.array([0.3, 0.2, 0.2, 0.1])
+
+def financial_risk_masks(arr: np.ndarray) -> np.ndarray:
+    """Boolean (n, 4) matrix of triggered financial risk rules; NaN marks a missing metric"""
+    runway, ltv, cac, churn, revenue = arr.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ltv_cac = ltv / np.where(cac == 0, np.nan, cac)
+    
+    return np.column_stack([
+        (runway != 0) & (runway < 12),
+        (ltv != 0) & (ltv_cac < 3),
+        churn > 15,
+        revenue == 0
+    ])
+
+def score_financials(arr: np.ndarray) -> np.ndarray:
+    """Financial risk score per row of [runway, ltv, cac, churn, revenue]"""
+    # Weights are added rule by rule rather than with a matrix product, so the
+    # float sums match the sequential checks exactly around red-flag thresholds
+    scores = np.zeros(len(arr))
+    for hits, weight in zip(financial_risk_masks(arr).T, FINANCIAL_RISK_WEIGHTS):
+        scores += hits * weight
+    return np.clip(scores, 0, 1)
 
 class SkepticAgent:
     def __init__(self, project_id: str, region: str):
-        vertexai.init(project=project_id, location=region)
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        self.gemini_model = CachedGemini(
+            get_gemini(project_id, region), semantic_cache=get_semantic_cache()
+        )
         
         # Define risk categories and their weights
         self.risk_categories = {
@@ -18,161 +121,114 @@ class SkepticAgent:
             "competitive_risk": 0.10,
             "technical_risk": 0.10
         }
+        
+        # Fixed category order so scores can be reduced as vectors
+        self._cat_names = tuple(self.risk_categories)
+        self._cat_keys = tuple(f"{name}s" for name in self._cat_names)
+        self._cat_weights = np.array(list(self.risk_categories.values()))
     
     async def analyze_risks(self, enriched_profile: Dict[str, Any], 
                           quant_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Comprehensive risk analysis"""
+        profile_risks = await self.analyze_profile_risks(enriched_profile)
+        return self.analyze_quant_risks(enriched_profile, quant_analysis, profile_risks)
+    
+    async def analyze_profile_risks(self, enriched_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Risk categories that depend only on the profile, so they can run alongside benchmarking"""
+        fragments = self._serialize_prompt_fragments(enriched_profile)
         
-        risk_analyses = await asyncio.gather(
-            self._analyze_team_risks(enriched_profile),
-            self._analyze_market_risks(enriched_profile),
-            self._analyze_financial_risks(enriched_profile, quant_analysis),
-            self._analyze_execution_risks(enriched_profile),
-            self._analyze_competitive_risks(enriched_profile),
-            self._analyze_technical_risks(enriched_profile)
-        )
+        # Only the team/market assessment calls Gemini; the rest are local computations
+        qualitative_risks = await self._analyze_qualitative_risks(enriched_profile, fragments)
         
+        return {
+            "team_risks": qualitative_risks["team_risks"],
+            "market_risks": qualitative_risks["market_risks"],
+            "execution_risks": self._analyze_execution_risks(enriched_profile),
+            "competitive_risks": self._analyze_competitive_risks(enriched_profile),
+            "technical_risks": self._analyze_technical_risks(enriched_profile)
+        }
+    
+    def analyze_quant_risks(self, enriched_profile: Dict[str, Any],
+                            quant_analysis: Dict[str, Any],
+                            profile_risks: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the benchmark-dependent financial risks and summarize the full assessment"""
         risk_assessment = {
-            "team_risks": risk_analyses[0],
-            "market_risks": risk_analyses[1],
-            "financial_risks": risk_analyses[2],
-            "execution_risks": risk_analyses[3],
-            "competitive_risks": risk_analyses[4],
-            "technical_risks": risk_analyses[5]
+            "team_risks": profile_risks["team_risks"],
+            "market_risks": profile_risks["market_risks"],
+            "financial_risks": self._analyze_financial_risks(enriched_profile, quant_analysis),
+            "execution_risks": profile_risks["execution_risks"],
+            "competitive_risks": profile_risks["competitive_risks"],
+            "technical_risks": profile_risks["technical_risks"]
         }
         
         # Calculate overall risk score
-        overall_risk = await self._calculate_overall_risk(risk_assessment)
+        overall_risk = self._calculate_overall_risk(risk_assessment)
         
-        # Generate red flags summary
-        red_flags = await self._identify_red_flags(enriched_profile, risk_assessment)
+        # Generate red flags, questions and mitigations summary
+        red_flags, dd_questions, mitigations = self._summarize(risk_assessment)
         
         return {
             "risk_assessment": risk_assessment,
             "overall_risk_score": overall_risk,
             "red_flags": red_flags,
-            "due_diligence_questions": await self._generate_dd_questions(risk_assessment),
-            "risk_mitigation_suggestions": await self._suggest_risk_mitigation(risk_assessment)
+            "due_diligence_questions": dd_questions,
+            "risk_mitigation_suggestions": mitigations
         }
     
-    async def _analyze_team_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze team-related risks"""
-        founders = profile.get("founders", [])
-        founder_verification = profile.get("founder_verification", {})
-        
-        prompt = f"""
-        Analyze the team risks for this startup based on the following data:
-        
-        Founders:
-        {json.dumps(founders, indent=2)}
-        
-        Founder Verification:
-        {json.dumps(founder_verification, indent=2)}
-        
-        Identify risks related to:
-        - Experience gaps in key areas
-        - Co-founder dynamics and complementarity
-        - Previous startup experience
-        - Domain expertise
-        - Team completeness
-        - Key person dependency
-        
-        Return JSON with:
-        - "risk_score": 0-1 (1 being highest risk)
-        - "risk_factors": list of identified risks
-        - "strengths": list of team strengths
-        - "recommendations": suggested improvements
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
+    def _serialize_prompt_fragments(self, profile: Dict[str, Any]) -> Dict[str, str]:
+        """Serialize the profile JSON blocks embedded in the risk prompts"""
+        return {
+            "founders": jdumps(profile.get("founders", [])),
+            "founder_verification": jdumps(profile.get("founder_verification", {})),
+            "market_data": jdumps(profile.get("market_data", {})),
+            "competitor_analysis": jdumps(profile.get("competitor_analysis", {}))
+        }
+    
+    async def _analyze_qualitative_risks(self, profile: Dict[str, Any],
+                                         fragments: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Analyze team and market risks with a single Gemini call over the shared profile"""
+        if fragments is None:
+            fragments = self._serialize_prompt_fragments(profile)
+        prompt = _QUALITATIVE_RISK_TMPL.substitute(
+            **fragments,
+            problem_statement=profile.get("problem_statement", ""),
+            solution_description=profile.get("solution_description", "")
+        )
         
         try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
+            risks = await gemini_json(
+                self.gemini_model, prompt, QualitativeRisks,
+                semantic_scope=entity_scope("company", profile.get("company_name"))
+            )
+            return risks.model_dump()
+        except ValueError:
             return {
-                "risk_score": 0.5,
-                "risk_factors": ["Unable to analyze team risks"],
-                "strengths": [],
-                "recommendations": []
+                "team_risks": dict(TEAM_RISK_DEFAULT),
+                "market_risks": dict(MARKET_RISK_DEFAULT)
             }
     
-    async def _analyze_market_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze market-related risks"""
-        market_data = profile.get("market_data", {})
-        competitive_analysis = profile.get("competitor_analysis", {})
-        
-        prompt = f"""
-        Analyze market risks for this startup:
-        
-        Market Data:
-        {json.dumps(market_data, indent=2)}
-        
-        Competitive Analysis:
-        {json.dumps(competitive_analysis, indent=2)}
-        
-        Problem/Solution:
-        Problem: {profile.get("problem_statement", "")}
-        Solution: {profile.get("solution_description", "")}
-        
-        Assess risks related to:
-        - Market size and growth potential
-        - Market timing
-        - Customer acquisition challenges
-        - Market saturation
-        - Regulatory risks
-        - Economic sensitivity
-        
-        Return JSON with risk analysis.
-        """
-        
-        response = await self.gemini_model.generate_content_async(prompt)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return {"risk_score": 0.5, "risk_factors": [], "strengths": []}
-    
-    async def _analyze_financial_risks(self, profile: Dict[str, Any], 
-                                     quant_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_financial_risks(self, profile: Dict[str, Any], 
+                               quant_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze financial risks"""
         financials = profile.get("financials", {})
         traction_metrics = profile.get("traction_metrics", {})
         percentile_rankings = quant_analysis.get("percentile_rankings", {})
         
-        # Calculate key risk indicators
-        risks = []
-        risk_score = 0.0
-        
-        # Burn rate analysis
         burn_rate = financials.get("burn_rate", 0)
         revenue = financials.get("revenue", 0)
         runway_months = financials.get("runway_months", 0)
-        
-        if runway_months and runway_months < 12:
-            risks.append("Short runway - less than 12 months")
-            risk_score += 0.3
-        
-        # Unit economics analysis
         cac = traction_metrics.get("cac")
         ltv = traction_metrics.get("ltv")
-        
-        if cac and ltv and ltv/cac < 3:
-            risks.append("Poor unit economics - LTV/CAC ratio below 3")
-            risk_score += 0.2
-        
-        # Churn analysis
         churn_rate = traction_metrics.get("churn_rate")
-        if churn_rate and churn_rate > 15:
-            risks.append("High churn rate")
-            risk_score += 0.2
         
-        # Revenue growth
-        if revenue == 0:
-            risks.append("No revenue generated yet")
-            risk_score += 0.1
+        metrics = np.array(
+            [[runway_months, ltv, cac, churn_rate, revenue]], dtype=np.float64
+        )
+        masks = financial_risk_masks(metrics)[0]
+        risks = [factor for factor, hit in zip(FINANCIAL_RISK_FACTORS, masks) if hit]
         
         return {
-            "risk_score": min(risk_score, 1.0),
+            "risk_score": float(score_financials(metrics)[0]),
             "risk_factors": risks,
             "key_metrics": {
                 "runway_months": runway_months,
@@ -183,7 +239,7 @@ class SkepticAgent:
             "recommendations": self._generate_financial_recommendations(risks)
         }
     
-    async def _analyze_execution_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_execution_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze execution-related risks"""
         # This would analyze the startup's ability to execute on their plan
         return {
@@ -192,7 +248,7 @@ class SkepticAgent:
             "strengths": []
         }
     
-    async def _analyze_competitive_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_competitive_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze competitive risks"""
         competitive_analysis = profile.get("competitor_analysis", {})
         
@@ -202,7 +258,7 @@ class SkepticAgent:
             "strengths": []
         }
     
-    async def _analyze_technical_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_technical_risks(self, profile: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze technical risks"""
         tech_stack = profile.get("technology_stack", [])
         tech_analysis = profile.get("technology_analysis", {})
@@ -213,55 +269,41 @@ class SkepticAgent:
             "strengths": []
         }
     
-    async def _calculate_overall_risk(self, risk_assessment: Dict[str, Any]) -> float:
+    def _risk_scores(self, risk_assessment: Dict[str, Any]) -> np.ndarray:
+        """Category risk scores in fixed category order"""
+        return np.fromiter(
+            (risk_assessment.get(key, {}).get("risk_score", 0.5) for key in self._cat_keys),
+            dtype=np.float64,
+            count=len(self._cat_keys)
+        )
+    
+    def _calculate_overall_risk(self, risk_assessment: Dict[str, Any]) -> float:
         """Calculate weighted overall risk score"""
-        total_risk = 0.0
-        
-        for category, weight in self.risk_categories.items():
-            category_risk = risk_assessment.get(category, {}).get("risk_score", 0.5)
-            total_risk += category_risk * weight
-        
-        return total_risk
+        return float(self._risk_scores(risk_assessment) @ self._cat_weights)
     
-    async def _identify_red_flags(self, profile: Dict[str, Any], 
-                                 risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Identify critical red flags"""
-        red_flags = []
+    def _summarize(self, risk_assessment: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+        """Red flags, due diligence questions and mitigations in one pass over the categories"""
+        red_flags, questions, suggestions = [], [], []
         
-        # Check for high-priority red flags
-        for category, analysis in risk_assessment.items():
-            risk_score = analysis.get("risk_score", 0)
+        for key, risk_score in zip(self._cat_keys, self._risk_scores(risk_assessment)):
+            analysis = risk_assessment.get(key, {})
+            risk_factors = analysis.get("risk_factors", [])
+            
             if risk_score > 0.7:  # High risk threshold
                 red_flags.append({
-                    "category": category,
+                    "category": key,
                     "severity": "high",
-                    "description": f"High risk identified in {category.replace('_', ' ')}",
-                    "risk_factors": analysis.get("risk_factors", [])
+                    "description": f"High risk identified in {key.replace('_', ' ')}",
+                    "risk_factors": risk_factors
                 })
-        
-        return red_flags
-    
-    async def _generate_dd_questions(self, risk_assessment: Dict[str, Any]) -> List[str]:
-        """Generate due diligence questions based on risks"""
-        questions = []
-        
-        for category, analysis in risk_assessment.items():
-            risk_factors = analysis.get("risk_factors", [])
-            for risk in risk_factors:
-                questions.append(f"How do you plan to address: {risk}?")
-        
-        return questions[:10]  # Limit to top 10 questions
-    
-    async def _suggest_risk_mitigation(self, risk_assessment: Dict[str, Any]) -> List[str]:
-        """Suggest risk mitigation strategies"""
-        suggestions = []
-        
-        # Add specific suggestions based on risk categories
-        for category, analysis in risk_assessment.items():
-            if analysis.get("risk_score", 0) > 0.6:
+            
+            if risk_score > 0.6:
                 suggestions.extend(analysis.get("recommendations", []))
+            
+            if len(questions) < 10:
+                questions.extend(f"How do you plan to address: {risk}?" for risk in risk_factors)
         
-        return suggestions
+        return red_flags, questions[:10], suggestions  # Limit to top 10 questions
     
     def _generate_financial_recommendations(self, risks: List[str]) -> List[str]:
         """Generate financial risk mitigation recommendations"""
@@ -1,10 +1,47 @@
 # data/prompts/analysis_prompts.py
 
+# Static instructions sent as Gemini system instructions; prompts carry only startup data
 ANALYSIS_PROMPTS = {
     "swot": """
-    Generate SWOT analysis for the startup from structured data.
+    You generate comprehensive SWOT analyses for startups from structured data
+    covering the company, team, market, traction, quantitative benchmarks and risks.
+    
+    Create a SWOT analysis with:
+    - Strengths: 3-5 key strengths
+    - Weaknesses: 3-5 key weaknesses  
+    - Opportunities: 3-5 market opportunities
+    - Threats: 3-5 potential threats
+    
+    Return as JSON with clear, actionable insights.
     """,
     "investment_memo": """
-    Compose full investment memo using profile, benchmarking, risks.
+    You write professional investment memos (2-3 pages) for startup opportunities
+    using the company profile, benchmarking, scoring, SWOT and risk data provided.
+    
+    Structure the memo with these sections:
+    1. Executive Summary
+    2. Company Overview  
+    3. Market Opportunity
+    4. Team Assessment
+    5. Business Model & Traction
+    6. Financial Analysis
+    7. Risk Assessment
+    8. Investment Thesis
+    9. Recommendation
+    
+    Write in a professional, analytical tone suitable for an investment committee.
+    Be specific with numbers and provide clear reasoning for the recommendation.
+    """,
+    "quantitative_analysis": """
+    You analyze startup metrics against benchmarking data.
+    
+    Provide analysis on:
+    - Overall financial health
+    - Growth trajectory assessment
+    - Unit economics analysis
+    - Risk factors from metrics
+    - Recommendations for improvement
+    
+    Return as JSON with clear recommendations.
     """
 }
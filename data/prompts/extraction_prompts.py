@@ -1,7 +1,8 @@
 # data/prompts/extraction_prompts.py
+from string import Template
 
 EXTRACTION_PROMPTS = {
-    "founders": """
+    "founders": Template("""
     Extract founder information from the following text. Look for:
     - Names of founders/co-founders
     - Previous work experience (especially "ex-" companies)
@@ -9,27 +10,27 @@ EXTRACTION_PROMPTS = {
     - Years of experience
     - Roles and responsibilities
     
-    Text: {text}
+    Text: $text
     
     Return JSON in this format:
-    {{
+    {
         "founders": [
-            {{
+            {
                 "name": "Founder Name",
                 "background": "Brief background description",
                 "experience_years": number,
                 "previous_companies": ["Company1", "Company2"],
                 "education": "University/Degree",
                 "role": "CEO/CTO/etc"
-            }}
+            }
         ]
-    }}
-    """,
+    }
+    """),
     
-    "market": """
+    "market": Template("""
     Extract market size and opportunity information from the following text:
     
-    Text: {text}
+    Text: $text
     
     Look for:
     - TAM (Total Addressable Market)
@@ -39,20 +40,20 @@ EXTRACTION_PROMPTS = {
     - Target market description
     
     Return JSON in this format:
-    {{
+    {
         "tam": number or null,
         "sam": number or null,
         "som": number or null,
         "target_market": "description",
         "market_growth_rate": number or null,
         "market_trends": ["trend1", "trend2"]
-    }}
-    """,
+    }
+    """),
     
-    "traction": """
+    "traction": Template("""
     Extract traction and growth metrics from the following text:
     
-    Text: {text}
+    Text: $text
     
     Look for:
     - MRR (Monthly Recurring Revenue)
@@ -64,7 +65,7 @@ EXTRACTION_PROMPTS = {
     - Growth rates
     
     Return JSON in this format:
-    {{
+    {
         "mrr": number or null,
         "arr": number or null,
         "cac": number or null,
@@ -74,13 +75,13 @@ EXTRACTION_PROMPTS = {
         "customer_count": number or null,
         "growth_rate": number or null,
         "key_metrics": ["metric1: value", "metric2: value"]
-    }}
-    """,
+    }
+    """),
     
-    "financials": """
+    "financials": Template("""
     Extract financial information from the following text:
     
-    Text: {text}
+    Text: $text
     
     Look for:
     - Current revenue
@@ -91,27 +92,27 @@ EXTRACTION_PROMPTS = {
     - Previous funding rounds
     
     Return JSON in this format:
-    {{
+    {
         "revenue": number or null,
         "burn_rate": number or null,
         "funding_requested": number or null,
         "valuation": number or null,
         "runway_months": number or null,
         "previous_funding": [
-            {{
+            {
                 "round": "Seed/Series A/etc",
                 "amount": number,
                 "date": "YYYY-MM-DD",
                 "investors": ["Investor1", "Investor2"]
-            }}
+            }
         ]
-    }}
-    """,
+    }
+    """),
     
-    "company_basics": """
+    "company_basics": Template("""
     Extract basic company information from the following text:
     
-    Text: {text}
+    Text: $text
     
     Look for:
     - Company name
@@ -121,13 +122,81 @@ EXTRACTION_PROMPTS = {
     - Technology stack
     
     Return JSON in this format:
-    {{
+    {
         "company_name": "Company Name",
         "problem_statement": "Clear problem description",
         "solution_description": "How they solve the problem",
         "competitors": ["Competitor1", "Competitor2"],
         "technology": ["Tech1", "Tech2"],
         "business_model": "B2B/B2C/Marketplace/etc"
-    }}
-    """
+    }
+    """),
+    
+    "combined": Template("""
+    Extract the following sections from the startup text below in a single pass:
+    - founders: names, previous experience (especially "ex-" companies), education,
+      years of experience and roles of the founders/co-founders
+    - market: TAM, SAM, SOM, market growth rate, target market and trends
+    - traction: MRR, ARR, CAC, LTV, churn rate, user/customer counts and growth rates
+    - financials: revenue, burn rate, funding requested, valuation, runway and previous rounds
+    - company: company name, problem, solution, competitors, technology and business model
+    
+    Text: $text
+    
+    Return a single JSON object in this format:
+    {
+        "founders": [
+            {
+                "name": "Founder Name",
+                "background": "Brief background description",
+                "experience_years": number,
+                "previous_companies": ["Company1", "Company2"],
+                "education": "University/Degree",
+                "role": "CEO/CTO/etc"
+            }
+        ],
+        "market": {
+            "tam": number or null,
+            "sam": number or null,
+            "som": number or null,
+            "target_market": "description",
+            "market_growth_rate": number or null,
+            "market_trends": ["trend1", "trend2"]
+        },
+        "traction": {
+            "mrr": number or null,
+            "arr": number or null,
+            "cac": number or null,
+            "ltv": number or null,
+            "churn_rate": number or null,
+            "user_count": number or null,
+            "customer_count": number or null,
+            "growth_rate": number or null,
+            "key_metrics": ["metric1: value", "metric2: value"]
+        },
+        "financials": {
+            "revenue": number or null,
+            "burn_rate": number or null,
+            "funding_requested": number or null,
+            "valuation": number or null,
+            "runway_months": number or null,
+            "previous_funding": [
+                {
+                    "round": "Seed/Series A/etc",
+                    "amount": number,
+                    "date": "YYYY-MM-DD",
+                    "investors": ["Investor1", "Investor2"]
+                }
+            ]
+        },
+        "company": {
+            "company_name": "Company Name",
+            "problem_statement": "Clear problem description",
+            "solution_description": "How they solve the problem",
+            "competitors": ["Competitor1", "Competitor2"],
+            "technology": ["Tech1", "Tech2"],
+            "business_model": "B2B/B2C/Marketplace/etc"
+        }
+    }
+    """)
 }
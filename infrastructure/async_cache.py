@@ -0,0 +1,50 @@
+# infrastructure/async_cache.py
+import asyncio
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+def async_lru_ttl(maxsize: int = 4096, ttl: float = 3600,
+                  key: Optional[Callable[..., str]] = None):
+    """Memoize a coroutine function with LRU eviction, expiry and in-flight coalescing
+
+    Concurrent calls with the same key await a single upstream call. Failed
+    calls are not cached. key maps the call arguments to a string and
+    defaults to their repr.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        entries: "OrderedDict[bytes, Tuple[asyncio.Future, float]]" = OrderedDict()
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            raw_key = key(*args, **kwargs) if key else repr((args, sorted(kwargs.items())))
+            digest = hashlib.sha256(raw_key.encode("utf-8")).digest()
+            now = time.monotonic()
+
+            entry = entries.get(digest)
+            if entry is not None and entry[1] > now:
+                entries.move_to_end(digest)
+                return await asyncio.shield(entry[0])
+
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            entries[digest] = (task, now + ttl)
+            entries.move_to_end(digest)
+            while len(entries) > maxsize:
+                entries.popitem(last=False)
+
+            # Evicted from the task itself, so a failure is dropped even when
+            # every caller awaiting it has been cancelled
+            def _evict_failure(finished: asyncio.Future) -> None:
+                if finished.cancelled() or finished.exception() is not None:
+                    if entries.get(digest, (None,))[0] is finished:
+                        del entries[digest]
+
+            task.add_done_callback(_evict_failure)
+            return await asyncio.shield(task)
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
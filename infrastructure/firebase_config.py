@@ -1,13 +1,26 @@
 # infrastructure/firebase_config.py
 
+import threading
+from functools import lru_cache
+
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials
+from google.cloud.firestore_v1 import AsyncClient
+
+_init_lock = threading.Lock()
 
 def init_firestore(credentials_path=None, project_id=None):
     if credentials_path:
         cred = credentials.Certificate(credentials_path)
     else:
         cred = credentials.ApplicationDefault()
-    if not firebase_admin._apps:
-        firebase_admin.initialize_app(cred, {'projectId': project_id})
-    return firestore.client()
+    # Guard the app registry so concurrent callers cannot double-initialize
+    with _init_lock:
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred, {'projectId': project_id})
+    return AsyncClient(project=project_id, credentials=cred.get_credential())
+
+@lru_cache(maxsize=None)
+def get_firestore(credentials_path=None, project_id=None):
+    """Process-wide async Firestore client sharing one gRPC channel"""
+    return init_firestore(credentials_path, project_id)
@@ -1,10 +1,9 @@
 # infrastructure/gcp_setup.py
 import os
 from google.cloud import aiplatform
-from google.cloud import bigquery
-from google.cloud import storage
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.gcp_clients import get_bigquery_client, get_storage_client
 
 class GCPSetup:
     def __init__(self, project_id: str, region: str = "us-central1"):
@@ -17,10 +16,10 @@ class GCPSetup:
         aiplatform.init(project=self.project_id, location=self.region)
         
         # BigQuery
-        self.bq_client = bigquery.Client(project=self.project_id)
+        self.bq_client = get_bigquery_client(self.project_id)
         
         # Cloud Storage
-        self.storage_client = storage.Client(project=self.project_id)
+        self.storage_client = get_storage_client(self.project_id)
         
         # Firebase
         if not firebase_admin._apps:
@@ -0,0 +1,236 @@
+# infrastructure/llm_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import numpy as np
+from cachetools import TTLCache
+from vertexai.language_models import TextEmbeddingModel
+from infrastructure.retries import resilient
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response served from cache"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class SQLiteResponseStore:
+    """Persistent response store so cache hits survive process restarts"""
+
+    def __init__(self, path: str, max_entries: int = 10000,
+                 ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response BLOB, created_at REAL, "
+            "model TEXT, last_access REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)"
+        )
+        self._conn.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, model_name: str, text: str):
+        await asyncio.to_thread(self._set, key, model_name, text)
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return response.decode("utf-8")
+
+    def _set(self, key: str, model_name: str, text: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, text.encode("utf-8"), now, model_name, now)
+            )
+            # Evict least recently used entries beyond the size limit
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN ("
+                "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+def _default_store() -> Optional[SQLiteResponseStore]:
+    """Persistent tier, enabled by pointing LLM_CACHE_PATH at a SQLite file"""
+    path = os.getenv("LLM_CACHE_PATH")
+    if not path:
+        return None
+    return SQLiteResponseStore(path, max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")))
+
+class SemanticCache:
+    """Reuses responses for prompts whose embeddings are near-duplicates
+    
+    Vectors are unit-normalized and kept per namespace (model, generation
+    options and the entity the prompt is about), so a lookup is a single
+    inner-product scan over prior prompts for the same entity.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 1024,
+                 embedding_model_name: str = "text-embedding-004"):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.embedding_model_name = embedding_model_name
+        self._embedding_model = None
+        self._embed_sem = asyncio.Semaphore(int(os.getenv("LLM_EMBED_MAX_CONCURRENCY", "4")))
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._responses: Dict[str, List[str]] = {}
+
+    @resilient
+    async def embed(self, prompt: str) -> np.ndarray:
+        """Embed a prompt as a unit-length vector"""
+        if self._embedding_model is None:
+            self._embedding_model = TextEmbeddingModel.from_pretrained(self.embedding_model_name)
+        async with self._embed_sem:
+            embeddings = await self._embedding_model.get_embeddings_async([prompt])
+        vector = np.asarray(embeddings[0].values, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def lookup(self, namespace: str, vector: np.ndarray) -> Optional[str]:
+        """Return the response of the most similar prompt above the threshold"""
+        vectors = self._vectors.get(namespace)
+        if vectors is None:
+            return None
+
+        similarities = vectors @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._responses[namespace][best]
+
+    def add(self, namespace: str, vector: np.ndarray, text: str):
+        """Index a response under its prompt embedding, dropping the oldest beyond maxsize"""
+        vectors = self._vectors.get(namespace)
+        if vectors is None:
+            vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+            self._responses[namespace] = []
+
+        self._vectors[namespace] = np.vstack([vectors, vector])[-self.maxsize:]
+        self._responses[namespace] = (self._responses[namespace] + [text])[-self.maxsize:]
+
+@lru_cache(maxsize=None)
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache shared by agents, enabled by LLM_SEMANTIC_CACHE=1"""
+    if os.getenv("LLM_SEMANTIC_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    return SemanticCache(threshold=float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.92")))
+
+def _is_deterministic(options: Dict[str, Any]) -> bool:
+    """Only greedy (temperature 0) calls may be answered from a similar prompt"""
+    config = options.get("generation_config")
+    if config is None:
+        return False
+    if hasattr(config, "to_dict"):
+        config = config.to_dict()
+    return config.get("temperature") == 0
+
+def _is_valid(text: str, validate: Optional[Callable[[str], Any]]) -> bool:
+    """Whether a cached reply passes the caller's check; entries from before it are re-fetched"""
+    if validate is None:
+        return True
+    try:
+        validate(text)
+    except ValueError:
+        return False
+    return True
+
+class CachedGemini:
+    """Wraps a GenerativeModel with a content-addressed response cache"""
+
+    # Shared across agents so identical prompts hit regardless of caller
+    _cache = TTLCache(maxsize=1024, ttl=DEFAULT_TTL_SECONDS)
+    _store = _default_store()
+
+    def __init__(self, model: Any, model_name: str = "gemini-1.5-pro",
+                 semantic_cache: Optional[SemanticCache] = None):
+        self.model = model
+        self.model_name = model_name
+        self.semantic_cache = semantic_cache
+
+    async def generate_content_async(self, prompt: str, semantic_scope: Optional[str] = None,
+                                     validate: Optional[Callable[[str], Any]] = None,
+                                     **kwargs) -> Any:
+        """Return a cached response for the prompt, calling Gemini on a miss
+        
+        Near-duplicate prompts are only reused when the caller names the entity
+        the prompt is about in semantic_scope, and only within that entity.
+        validate is applied to the reply text before it is cached; if it
+        raises, the error propagates and nothing is cached, so a malformed
+        reply is never served again.
+        """
+        key = self._cache_key(prompt, kwargs)
+        cached_text = self._cache.get(key)
+        if cached_text is None and self._store is not None:
+            cached_text = await self._store.get(key)
+            if cached_text is not None:
+                self._cache[key] = cached_text
+        if cached_text is not None and _is_valid(cached_text, validate):
+            return CachedResponse(cached_text)
+
+        namespace, vector = None, None
+        if self.semantic_cache is not None and semantic_scope and _is_deterministic(kwargs):
+            namespace = self._cache_key("", dict(kwargs, semantic_scope=semantic_scope))
+            vector = await self.semantic_cache.embed(prompt)
+            cached_text = self.semantic_cache.lookup(namespace, vector)
+            if cached_text is not None and _is_valid(cached_text, validate):
+                self._cache[key] = cached_text
+                return CachedResponse(cached_text)
+
+        response = await self.model.generate_content_async(prompt, **kwargs)
+        if validate is not None:
+            validate(response.text)
+        self._cache[key] = response.text
+        if self._store is not None:
+            await self._store.set(key, self.model_name, response.text)
+        if vector is not None:
+            self.semantic_cache.add(namespace, vector, response.text)
+        return response
+
+    def stream_content_async(self, prompt: str, **kwargs) -> AsyncIterator[Any]:
+        """Stream a response from the model; streams are consumed incrementally and never cached"""
+        return self.model.stream_content_async(prompt, **kwargs)
+
+    def _cache_key(self, prompt: str, options: dict) -> str:
+        """Build a stable key from the model, normalized prompt and generation options"""
+        key_source = json.dumps(
+            {
+                "m": self.model_name.lower(),
+                "p": unicodedata.normalize("NFC", prompt).strip(),
+                "cfg": options
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
@@ -0,0 +1,65 @@
+# infrastructure/retries.py
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+import aiohttp
+from google.api_core import exceptions as gcp_exceptions
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying; other 4xx responses will not succeed on a retry
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+RETRYABLE_GCP_ERRORS = (
+    gcp_exceptions.ResourceExhausted,
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.InternalServerError
+)
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+def _is_transient(error: BaseException) -> bool:
+    """Rate limits, overloads and dropped connections; not caller errors"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (aiohttp.ClientError, *RETRYABLE_GCP_ERRORS))
+
+def _retry_after_or_backoff(retry_state: RetryCallState) -> float:
+    """Honor a server-sent Retry-After header, else jittered exponential backoff"""
+    error = retry_state.outcome.exception()
+    headers = getattr(error, "headers", None)
+    if headers and "Retry-After" in headers:
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
+def resilient(func: Callable[..., Awaitable[T]] = None, *, attempts: int = 5):
+    """Retry an async call on transient failures with jittered exponential backoff
+
+    Usable bare (@resilient) or with options (@resilient(attempts=3)).
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(_is_transient),
+                wait=_retry_after_or_backoff,
+                stop=stop_after_attempt(attempts),
+                reraise=True
+            ):
+                with attempt:
+                    return await func(*args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -1,16 +1,30 @@
 # main.py
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
+import hashlib
+import json
 import uuid
 import os
+from datetime import timedelta
+from functools import lru_cache
 import aiofiles
+import google.auth
+import google.auth.credentials
+import google.auth.transport.requests
 from orchestrator.workflow_manager import WorkflowManager
+from utils.serialization import jloads
 import logging
+import logging.handlers
+import queue
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; records are handed to a background thread so that
+# writing them never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Project Athena - AI Startup Analysis", version="1.0.0")
@@ -24,10 +38,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize workflow manager
 PROJECT_ID = "project-drishti-466708"
 REGION = os.getenv("GOOGLE_CLOUD_REGION", "us-central1")
-workflow_manager = WorkflowManager(PROJECT_ID, REGION)
+
+# Built in a startup hook so that importing this module (as worker processes
+# may) does not start threads or open GCP clients
+workflow_manager: Optional[WorkflowManager] = None
+
+UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_BUCKET = os.getenv("SCRIBE_UPLOAD_BUCKET", f"{PROJECT_ID}-scribe-uploads")
+SIGNED_URL_EXPIRY = timedelta(minutes=15)
+
+# Accepted content types and the extension passed to the Scribe agent for each
+CONTENT_TYPE_EXT = {
+    "application/pdf": "pdf",
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "audio/mpeg": "mp3",
+    "audio/wav": "wav"
+}
+ALLOWED_TYPES = frozenset(CONTENT_TYPE_EXT)
+
+@app.on_event("startup")
+def _start_log_listener():
+    _log_listener.start()
+
+@app.on_event("startup")
+def _init_workflow_manager():
+    global workflow_manager
+    workflow_manager = WorkflowManager(PROJECT_ID, REGION)
+
+@app.on_event("startup")
+def _ensure_upload_dir():
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+@app.on_event("startup")
+async def _prefetch_benchmarks():
+    """Warm the benchmark cache so the first analyses skip BigQuery"""
+    try:
+        await workflow_manager.quant.prefetch_benchmarks()
+    except Exception as e:
+        logger.warning(f"Benchmark prefetch failed: {e}")
+
+@app.on_event("shutdown")
+async def _flush_pending_rows():
+    await workflow_manager.close()
+
+@app.on_event("shutdown")
+async def _close_http_session():
+    await workflow_manager.scout.close()
+
+@app.on_event("shutdown")
+def _stop_log_listener():
+    _log_listener.stop()
 
 # Data models
 class AnalysisSubmission(BaseModel):
@@ -40,6 +104,19 @@ class AnalysisResponse(BaseModel):
     status: str
     message: str
 
+class UploadInitiation(BaseModel):
+    filename: str
+    content_type: str
+
+class UploadTicket(BaseModel):
+    submission_id: str
+    upload_url: str
+    gcs_uri: str
+
+class StartAnalysis(BaseModel):
+    gcs_uri: str
+    metadata: Dict[str, Any] = {}
+
 @app.post("/api/v1/analyze/upload", response_model=AnalysisResponse)
 async def upload_and_analyze(
     background_tasks: BackgroundTasks,
@@ -49,8 +126,7 @@ async def upload_and_analyze(
     """Upload file and start analysis"""
     
     # Validate file type
-    allowed_types = ['application/pdf', 'image/jpeg', 'image/png', 'audio/mpeg', 'audio/wav']
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(
             status_code=400, 
             detail=f"File type {file.content_type} not supported"
@@ -60,22 +136,33 @@ async def upload_and_analyze(
     submission_id = str(uuid.uuid4())
     
     # Save uploaded file
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'unknown'
-    file_path = f"{upload_dir}/{submission_id}.{file_extension}"
+    file_extension = CONTENT_TYPE_EXT[file.content_type]
+    file_path = f"{UPLOAD_DIR}/{submission_id}.{file_extension}"
     
+    # Stream to disk so memory stays bounded by the chunk size, hashing as we go
+    hasher = hashlib.blake2b(digest_size=16)
     async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            await out_file.write(chunk)
+    content_hash = hasher.hexdigest()
+    
+    # An identical deck that was already analyzed is answered from its existing result
+    existing_id = await workflow_manager.find_completed_analysis(content_hash)
+    if existing_id:
+        os.remove(file_path)
+        logger.info(f"Upload matches completed analysis {existing_id}")
+        return AnalysisResponse(
+            submission_id=existing_id,
+            status="completed",
+            message="Identical document already analyzed"
+        )
     
     # Parse metadata
     metadata_dict = {}
     if metadata:
         try:
-            import json
-            metadata_dict = json.loads(metadata)
+            metadata_dict = jloads(metadata)
         except json.JSONDecodeError:
             pass
     
@@ -85,7 +172,100 @@ async def upload_and_analyze(
         submission_id,
         file_path,
         file_extension,
-        metadata_dict
+        metadata_dict,
+        content_hash
+    )
+    
+    logger.info(f"Started analysis for submission {submission_id}")
+    
+    return AnalysisResponse(
+        submission_id=submission_id,
+        status="processing",
+        message="Analysis started successfully"
+    )
+
+@lru_cache(maxsize=None)
+def _signing_credentials():
+    credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+    return credentials
+
+def _signed_upload_url(blob, content_type: str) -> str:
+    """Sign a V4 PUT URL for the blob
+    
+    Key-file and impersonated credentials sign locally. Cloud Run and App
+    Engine runtime credentials carry no private key, so the URL is signed
+    remotely through the IAM signBlob API as the runtime service account.
+    """
+    credentials = _signing_credentials()
+    options = {
+        "version": "v4",
+        "method": "PUT",
+        "expiration": SIGNED_URL_EXPIRY,
+        "content_type": content_type
+    }
+    if isinstance(credentials, google.auth.credentials.Signing):
+        return blob.generate_signed_url(credentials=credentials, **options)
+    
+    if not hasattr(credentials, "service_account_email"):
+        raise HTTPException(
+            status_code=503,
+            detail="Direct uploads need service account credentials to sign URLs; "
+                   "use /api/v1/analyze/upload instead"
+        )
+    if not credentials.valid:
+        credentials.refresh(google.auth.transport.requests.Request())
+    return blob.generate_signed_url(
+        service_account_email=credentials.service_account_email,
+        access_token=credentials.token,
+        **options
+    )
+
+@app.post("/api/v1/analyze/initiate", response_model=UploadTicket)
+async def initiate_upload(request: UploadInitiation):
+    """Issue a signed URL so the client can PUT the file straight to GCS"""
+    if request.content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File type {request.content_type} not supported"
+        )
+    
+    submission_id = str(uuid.uuid4())
+    file_extension = CONTENT_TYPE_EXT[request.content_type]
+    blob_name = f"submissions/{submission_id}.{file_extension}"
+    
+    blob = workflow_manager.gcp_clients.storage_client.bucket(UPLOAD_BUCKET).blob(blob_name)
+    upload_url = await run_in_threadpool(_signed_upload_url, blob, request.content_type)
+    
+    return UploadTicket(
+        submission_id=submission_id,
+        upload_url=upload_url,
+        gcs_uri=f"gs://{UPLOAD_BUCKET}/{blob_name}"
+    )
+
+@app.post("/api/v1/analyze/{submission_id}/start", response_model=AnalysisResponse)
+async def start_uploaded_analysis(submission_id: str, request: StartAnalysis,
+                                  background_tasks: BackgroundTasks):
+    """Start analysis of a file the client uploaded via its signed URL"""
+    expected_prefix = f"gs://{UPLOAD_BUCKET}/submissions/{submission_id}."
+    if not request.gcs_uri.startswith(expected_prefix):
+        raise HTTPException(status_code=400, detail="Upload URI does not match submission")
+    
+    blob_name = request.gcs_uri[len(f"gs://{UPLOAD_BUCKET}/"):]
+    blob = workflow_manager.gcp_clients.storage_client.bucket(UPLOAD_BUCKET).blob(blob_name)
+    if not await run_in_threadpool(blob.exists):
+        raise HTTPException(status_code=409, detail="File has not been uploaded yet")
+    
+    # Claiming the state document first makes a repeated start a no-op
+    if not await workflow_manager.claim_submission(submission_id):
+        raise HTTPException(status_code=409, detail="Analysis already started for this submission")
+    
+    file_extension = request.gcs_uri[len(expected_prefix):]
+    background_tasks.add_task(
+        workflow_manager.process_startup_submission,
+        submission_id,
+        request.gcs_uri,
+        file_extension,
+        request.metadata
     )
     
     logger.info(f"Started analysis for submission {submission_id}")
@@ -129,10 +309,11 @@ async def get_analysis_results(submission_id: str):
     }
 
 @app.get("/api/v1/analyses/recent")
-async def list_recent_analyses(limit: int = 20):
-    """List recent analyses"""
-    analyses = await workflow_manager.list_recent_analyses(limit)
-    return {"analyses": analyses}
+async def list_recent_analyses(limit: int = 20, start_after: Optional[str] = None):
+    """List recent analyses; pass next_cursor as start_after for the next page"""
+    analyses = await workflow_manager.list_recent_analyses(limit, start_after)
+    next_cursor = analyses[-1]["submission_id"] if len(analyses) == limit else None
+    return {"analyses": analyses, "next_cursor": next_cursor}
 
 @app.get("/api/v1/health")
 async def health_check():
@@ -1,16 +1,64 @@
 # orchestrator/workflow_manager.py
 import asyncio
-from typing import Dict, Any, List
+import hashlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from cachetools import TTLCache
 from agents.scribe_agent import ScribeAgent
 from agents.librarian_agent import LibrarianAgent
 from agents.scout_agent import ScoutAgent
 from agents.quant_agent import QuantAgent
 from agents.skeptic_agent import SkepticAgent
 from agents.analyst_agent import AnalystAgent
-from utils.gcp_clients import GCPClients
+from infrastructure.firebase_config import get_firestore
+from utils.gcp_clients import GCPClients, get_bigquery_client
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import firestore
 import json
-from datetime import datetime
+import logging
+from datetime import datetime, UTC
+
+logger = logging.getLogger(__name__)
+
+# Completed analyses are appended to BigQuery in batches of up to this many rows,
+# or whatever has accumulated after this many seconds
+BQ_BATCH_SIZE = 500
+BQ_FLUSH_INTERVAL = 2.0
+
+# Longest a run waits for its background state writes before returning
+STATE_WRITE_TIMEOUT = 30.0
+
+# Stage outputs persisted with the terminal state write
+STAGE_RESULT_KEYS = (
+    "ingestion_result", "startup_profile", "enriched_profile",
+    "quant_analysis", "risk_analysis"
+)
+
+# Agents hold model and API clients, so each is built once per process and
+# project, on first use, and shared by every WorkflowManager
+@lru_cache(maxsize=None)
+def get_scribe(project_id: str, region: str) -> ScribeAgent:
+    return ScribeAgent(project_id, region)
+
+@lru_cache(maxsize=None)
+def get_librarian(project_id: str, region: str) -> LibrarianAgent:
+    return LibrarianAgent(project_id, region)
+
+@lru_cache(maxsize=None)
+def get_scout(project_id: str, region: str) -> ScoutAgent:
+    return ScoutAgent(project_id, region)
+
+@lru_cache(maxsize=None)
+def get_quant(project_id: str, region: str) -> QuantAgent:
+    return QuantAgent(project_id, region, get_bigquery_client(project_id))
+
+@lru_cache(maxsize=None)
+def get_skeptic(project_id: str, region: str) -> SkepticAgent:
+    return SkepticAgent(project_id, region)
+
+@lru_cache(maxsize=None)
+def get_analyst(project_id: str, region: str) -> AnalystAgent:
+    return AnalystAgent(project_id, region)
 
 class WorkflowManager:
     def __init__(self, project_id: str, region: str = "us-central1"):
@@ -20,125 +68,408 @@ class WorkflowManager:
         # Initialize GCP clients
         self.gcp_clients = GCPClients(project_id, region)
         
-        # Initialize agents
-        self.scribe = ScribeAgent(project_id, region)
-        self.librarian = LibrarianAgent(project_id, region)
-        self.scout = ScoutAgent(project_id, region)
-        self.quant = QuantAgent(project_id, region, self.gcp_clients.bq_client)
-        self.skeptic = SkepticAgent(project_id, region)
-        self.analyst = AnalystAgent(project_id, region)
+        # Async Firestore for state management, so RPCs never block the event loop
+        self.db = get_firestore(project_id=project_id)
+        
+        # Re-analyses of identical profiles reuse recent enrichment and benchmark results
+        self._scout_cache = TTLCache(maxsize=1024, ttl=1800)
+        self._quant_cache = TTLCache(maxsize=1024, ttl=3600)
+        
+        # Stage updates are coalesced and committed in batches by a background flusher
+        self._state_updates: asyncio.Queue = asyncio.Queue()
+        self._state_flusher = None
         
-        # Firestore for state management
-        self.db = firestore.Client(project=project_id)
+        # State writes run in the background, tracked per submission so each
+        # run waits only on its own writes before returning results
+        self._pending_writes: Dict[str, Set[asyncio.Task]] = {}
+        
+        # Completed analyses are buffered and streamed to BigQuery in batches
+        self._bq_rows: asyncio.Queue = asyncio.Queue()
+        self._bq_flusher = None
+    
+    @property
+    def scribe(self) -> ScribeAgent:
+        return get_scribe(self.project_id, self.region)
+    
+    @property
+    def librarian(self) -> LibrarianAgent:
+        return get_librarian(self.project_id, self.region)
+    
+    @property
+    def scout(self) -> ScoutAgent:
+        return get_scout(self.project_id, self.region)
+    
+    @property
+    def quant(self) -> QuantAgent:
+        return get_quant(self.project_id, self.region)
+    
+    @property
+    def skeptic(self) -> SkepticAgent:
+        return get_skeptic(self.project_id, self.region)
+    
+    @property
+    def analyst(self) -> AnalystAgent:
+        return get_analyst(self.project_id, self.region)
     
     async def process_startup_submission(self, submission_id: str, 
                                        file_path: str, file_type: str,
-                                       metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+                                       metadata: Dict[str, Any] = None,
+                                       content_hash: str = None) -> Dict[str, Any]:
         """Main orchestration workflow"""
         
-        # Initialize analysis state
+        analysis_state = await self._start_analysis(submission_id, file_path, file_type, metadata)
+        if content_hash:
+            analysis_state["content_hash"] = content_hash
+        
+        try:
+            await self._run_extraction_stages(analysis_state)
+            await self._run_quant_stages(analysis_state)
+            return await self._run_synthesis_stage(analysis_state)
+            
+        except Exception as e:
+            await self._fail_analysis(analysis_state, e)
+            raise e
+        
+        finally:
+            await self._drain_pending_writes([submission_id])
+    
+    async def process_submission_batch(self, submissions: List[Dict[str, Any]],
+                                       max_inflight: int = 4) -> List[Dict[str, Any]]:
+        """Run a batch of decks through a staged pipeline
+        
+        Extraction, quant and synthesis run as separate workers connected by
+        bounded queues, so while one deck is in synthesis the next can be in
+        quant and a third in extraction. At most max_inflight decks are in
+        the pipeline at once. Results are returned in submission order; a
+        failed deck yields its error state instead of raising.
+        """
+        quant_queue: asyncio.Queue = asyncio.Queue(maxsize=max_inflight)
+        synthesis_queue: asyncio.Queue = asyncio.Queue(maxsize=max_inflight)
+        inflight = asyncio.Semaphore(max_inflight)
+        results: List[Dict[str, Any]] = [None] * len(submissions)
+        
+        async def extraction_worker():
+            try:
+                for index, submission in enumerate(submissions):
+                    await inflight.acquire()
+                    analysis_state = await self._start_analysis(
+                        submission["submission_id"], submission["file_path"],
+                        submission["file_type"], submission.get("metadata")
+                    )
+                    try:
+                        await self._run_extraction_stages(analysis_state)
+                    except Exception as e:
+                        results[index] = await self._fail_analysis(analysis_state, e)
+                        inflight.release()
+                        continue
+                    await quant_queue.put((index, analysis_state))
+            finally:
+                # Always signal downstream so the other workers drain and exit
+                await quant_queue.put(None)
+        
+        async def quant_worker():
+            try:
+                while (item := await quant_queue.get()) is not None:
+                    index, analysis_state = item
+                    try:
+                        await self._run_quant_stages(analysis_state)
+                    except Exception as e:
+                        results[index] = await self._fail_analysis(analysis_state, e)
+                        inflight.release()
+                        continue
+                    await synthesis_queue.put(item)
+            finally:
+                await synthesis_queue.put(None)
+        
+        async def synthesis_worker():
+            while (item := await synthesis_queue.get()) is not None:
+                index, analysis_state = item
+                try:
+                    results[index] = await self._run_synthesis_stage(analysis_state)
+                except Exception as e:
+                    results[index] = await self._fail_analysis(analysis_state, e)
+                finally:
+                    inflight.release()
+        
+        await asyncio.gather(
+            asyncio.create_task(extraction_worker()),
+            asyncio.create_task(quant_worker()),
+            asyncio.create_task(synthesis_worker())
+        )
+        await self._drain_pending_writes(
+            [submission["submission_id"] for submission in submissions]
+        )
+        
+        return results
+    
+    async def claim_submission(self, submission_id: str) -> bool:
+        """Create the analysis state document; False if the submission already has one"""
+        doc_ref = self.db.collection("analysis_states").document(submission_id)
+        try:
+            await doc_ref.create({"status": "queued"})
+        except AlreadyExists:
+            return False
+        return True
+    
+    async def _start_analysis(self, submission_id: str, file_path: str, file_type: str,
+                              metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Create and persist the initial analysis state"""
         analysis_state = {
             "submission_id": submission_id,
             "status": "processing",
             "current_stage": "ingestion",
-            "started_at": datetime.utcnow().isoformat(),
+            "started_at": datetime.now(UTC),
             "file_path": file_path,
             "file_type": file_type,
             "metadata": metadata or {}
         }
         
-        # Save initial state
-        await self._save_analysis_state(submission_id, analysis_state)
+        # Save initial state; Firestore stamps the time as a native timestamp
+        self._save_state_in_background(
+            submission_id, {**analysis_state, "started_at": firestore.SERVER_TIMESTAMP}
+        )
+        return analysis_state
+    
+    async def _run_extraction_stages(self, analysis_state: Dict[str, Any]):
+        """Ingestion and structured data extraction"""
+        # Stage 1: Ingestion (Scribe Agent)
+        self._report_progress(analysis_state, "ingestion")
         
-        try:
-            # Stage 1: Ingestion (Scribe Agent)
-            print(f"Stage 1: Processing document - {file_path}")
-            analysis_state["current_stage"] = "ingestion"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            ingestion_result = await self.scribe.process_document(file_path, file_type)
-            analysis_state["ingestion_result"] = ingestion_result
-            
-            # Stage 2: Data Extraction (Librarian Agent)
-            print("Stage 2: Extracting structured data")
-            analysis_state["current_stage"] = "extraction"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            cleaned_text = ingestion_result.get("cleaned_text", "")
-            startup_profile = await self.librarian.extract_structured_data(cleaned_text)
-            analysis_state["startup_profile"] = startup_profile
-            
-            # Stage 3: Data Enrichment (Scout Agent)
-            print("Stage 3: Enriching with external data")
-            analysis_state["current_stage"] = "enrichment"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            enriched_profile = await self.scout.enrich_startup_data(startup_profile)
-            analysis_state["enriched_profile"] = enriched_profile
-            
-            # Stage 4: Quantitative Analysis (Quant Agent)
-            print("Stage 4: Performing quantitative analysis")
-            analysis_state["current_stage"] = "quantitative_analysis"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            quant_analysis = await self.quant.benchmark_startup(enriched_profile)
-            analysis_state["quant_analysis"] = quant_analysis
-            
-            # Stage 5: Risk Analysis (Skeptic Agent)
-            print("Stage 5: Analyzing risks")
-            analysis_state["current_stage"] = "risk_analysis"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            risk_analysis = await self.skeptic.analyze_risks(enriched_profile, quant_analysis)
-            analysis_state["risk_analysis"] = risk_analysis
-            
-            # Stage 6: Final Synthesis (Analyst Agent)
-            print("Stage 6: Generating final analysis")
-            analysis_state["current_stage"] = "synthesis"
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            final_analysis = await self.analyst.synthesize_analysis(
-                enriched_profile, quant_analysis, risk_analysis
+        ingestion_result = await self.scribe.process_document(
+            analysis_state["file_path"], analysis_state["file_type"]
+        )
+        analysis_state["ingestion_result"] = ingestion_result
+        
+        # Stage 2: Data Extraction (Librarian Agent)
+        self._report_progress(analysis_state, "extraction")
+        
+        cleaned_text = ingestion_result.get("cleaned_text", "")
+        startup_profile = await self.librarian.extract_structured_data(cleaned_text)
+        analysis_state["startup_profile"] = startup_profile
+    
+    async def _run_quant_stages(self, analysis_state: Dict[str, Any]):
+        """Enrichment, benchmarking and risk analysis"""
+        # Stage 3: Data Enrichment (Scout Agent)
+        self._report_progress(analysis_state, "enrichment")
+        
+        enriched_profile = await self._memoized(
+            self._scout_cache, analysis_state["startup_profile"], self.scout.enrich_startup_data
+        )
+        analysis_state["enriched_profile"] = enriched_profile
+        
+        # Stages 4 & 5: Quantitative Analysis (Quant Agent) runs alongside the
+        # profile-only risk checks (Skeptic Agent)
+        self._report_progress(analysis_state, "quantitative_analysis")
+        
+        quant_analysis, profile_risks = await asyncio.gather(
+            self._memoized(self._quant_cache, enriched_profile, self.quant.benchmark_startup),
+            self.skeptic.analyze_profile_risks(enriched_profile)
+        )
+        analysis_state["quant_analysis"] = quant_analysis
+        
+        # Stage 5: Risk Analysis (Skeptic Agent)
+        self._report_progress(analysis_state, "risk_analysis")
+        
+        risk_analysis = self.skeptic.analyze_quant_risks(enriched_profile, quant_analysis, profile_risks)
+        analysis_state["risk_analysis"] = risk_analysis
+    
+    async def _run_synthesis_stage(self, analysis_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Final synthesis, persistence and result assembly"""
+        submission_id = analysis_state["submission_id"]
+        enriched_profile = analysis_state["enriched_profile"]
+        risk_analysis = analysis_state["risk_analysis"]
+        
+        # Stage 6: Final Synthesis (Analyst Agent)
+        self._report_progress(analysis_state, "synthesis")
+        
+        final_analysis = await self.analyst.synthesize_analysis(
+            enriched_profile, analysis_state["quant_analysis"], risk_analysis
+        )
+        analysis_state["final_analysis"] = final_analysis
+        
+        # Complete the analysis
+        analysis_state["status"] = "completed"
+        analysis_state["current_stage"] = "completed"
+        analysis_state["completed_at"] = datetime.now(UTC)
+        
+        # Save to BigQuery for historical analysis
+        await self._save_to_bigquery(submission_id, analysis_state)
+        
+        # Final state save, with a denormalized summary for listing
+        analysis_state["summary"] = {
+            "company_name": enriched_profile.get("company_name", "Unknown"),
+            "status": "completed",
+            "decision": final_analysis.get("recommendation", {}).get("decision", "Pending")
+        }
+        self._save_state_in_background(submission_id, {
+            **{key: analysis_state[key]
+               for key in (*STAGE_RESULT_KEYS, "final_analysis", "status", "current_stage", "summary")},
+            "completed_at": firestore.SERVER_TIMESTAMP
+        })
+        if analysis_state.get("content_hash"):
+            self._track_write(
+                submission_id, self._record_content_hash(analysis_state["content_hash"], submission_id)
             )
-            analysis_state["final_analysis"] = final_analysis
-            
-            # Complete the analysis
-            analysis_state["status"] = "completed"
-            analysis_state["current_stage"] = "completed"
-            analysis_state["completed_at"] = datetime.utcnow().isoformat()
-            
-            # Save to BigQuery for historical analysis
-            await self._save_to_bigquery(submission_id, analysis_state)
-            
-            # Final state save
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            print(f"Analysis completed for {submission_id}")
-            
-            return {
+        
+        logger.info("Analysis completed for %s", submission_id,
+                    extra={"submission_id": submission_id, "stage": "completed"})
+        
+        return {
+            "submission_id": submission_id,
+            "status": "completed",
+            "startup_profile": enriched_profile,
+            "investment_memo": final_analysis["investment_memo"],
+            "recommendation": final_analysis["recommendation"],
+            "investment_score": final_analysis["investment_score"],
+            "risk_assessment": risk_analysis,
+            "analysis_metadata": final_analysis["analysis_metadata"]
+        }
+    
+    async def _fail_analysis(self, analysis_state: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Record a failed analysis and return its error state"""
+        logger.error("Error in workflow for %s: %s", analysis_state["submission_id"], error,
+                     extra={"submission_id": analysis_state["submission_id"],
+                            "stage": analysis_state.get("current_stage")})
+        analysis_state["status"] = "error"
+        analysis_state["error"] = str(error)
+        analysis_state["failed_at"] = datetime.now(UTC)
+        self._save_state_in_background(analysis_state["submission_id"], {
+            **{key: analysis_state[key]
+               for key in (*STAGE_RESULT_KEYS, "status", "current_stage", "error")
+               if key in analysis_state},
+            "failed_at": firestore.SERVER_TIMESTAMP
+        })
+        return analysis_state
+    
+    def _report_progress(self, analysis_state: Dict[str, Any], stage: str):
+        """Record a stage transition without waiting on Firestore"""
+        submission_id = analysis_state["submission_id"]
+        analysis_state["current_stage"] = stage
+        logger.info("Stage %s started for %s", stage, submission_id,
+                    extra={"submission_id": submission_id, "stage": stage})
+        
+        # Only the stage name goes through the batched flusher, so status polls
+        # on any instance see it without the stage outputs being rewritten
+        self._save_state_in_background(submission_id, {"current_stage": stage})
+    
+    async def _memoized(self, cache: TTLCache, profile: Dict[str, Any],
+                        compute: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return a cached stage result for an identical profile, computing it on a miss"""
+        key = hashlib.sha1(json.dumps(profile, sort_keys=True, default=str).encode()).digest()
+        if key in cache:
+            return cache[key]
+        
+        result = await compute(profile)
+        cache[key] = result
+        return result
+    
+    def _save_state_in_background(self, submission_id: str, delta: Dict[str, Any]):
+        """Start a state write without waiting for it to commit"""
+        self._track_write(submission_id, self._persist_state(submission_id, delta))
+    
+    def _track_write(self, submission_id: str, write: Awaitable[None]):
+        """Run a write in the background until its submission is drained"""
+        task = asyncio.create_task(write)
+        tasks = self._pending_writes.setdefault(submission_id, set())
+        tasks.add(task)
+        
+        def _done(finished: asyncio.Task):
+            tasks.discard(finished)
+            if not tasks and self._pending_writes.get(submission_id) is tasks:
+                del self._pending_writes[submission_id]
+        
+        task.add_done_callback(_done)
+    
+    async def _persist_state(self, submission_id: str, delta: Dict[str, Any]):
+        """Write a state delta, reporting rather than raising failures"""
+        try:
+            await self._update_analysis_state(submission_id, delta)
+        except Exception as e:
+            logger.error("Error saving state for %s: %s", submission_id, e,
+                         extra={"submission_id": submission_id})
+    
+    async def _record_content_hash(self, content_hash: str, submission_id: str):
+        """Map a deck's content hash to its completed analysis"""
+        try:
+            await self.db.collection("analysis_by_hash").document(content_hash).set({
                 "submission_id": submission_id,
-                "status": "completed",
-                "startup_profile": enriched_profile,
-                "investment_memo": final_analysis["investment_memo"],
-                "recommendation": final_analysis["recommendation"],
-                "investment_score": final_analysis["investment_score"],
-                "risk_assessment": risk_analysis,
-                "analysis_metadata": final_analysis["analysis_metadata"]
-            }
-            
+                "status": "completed"
+            })
         except Exception as e:
-            print(f"Error in workflow: {str(e)}")
-            analysis_state["status"] = "error"
-            analysis_state["error"] = str(e)
-            analysis_state["failed_at"] = datetime.utcnow().isoformat()
-            await self._save_analysis_state(submission_id, analysis_state)
-            
-            raise e
+            logger.error("Error recording content hash for %s: %s", submission_id, e,
+                         extra={"submission_id": submission_id})
     
-    async def _save_analysis_state(self, submission_id: str, state: Dict[str, Any]):
-        """Save analysis state to Firestore"""
-        doc_ref = self.db.collection("analysis_states").document(submission_id)
-        doc_ref.set(state, merge=True)
+    async def find_completed_analysis(self, content_hash: str) -> Optional[str]:
+        """Return the submission ID of a completed analysis of identical content"""
+        doc = await self.db.collection("analysis_by_hash").document(content_hash).get()
+        if doc.exists and doc.get("status") == "completed":
+            return doc.get("submission_id")
+        return None
+    
+    async def _drain_pending_writes(self, submission_ids: List[str]):
+        """Wait, up to STATE_WRITE_TIMEOUT, for the given submissions' writes to finish"""
+        tasks = set()
+        for submission_id in submission_ids:
+            tasks.update(self._pending_writes.get(submission_id, ()))
+        if not tasks:
+            return
+        
+        _, unfinished = await asyncio.wait(tasks, timeout=STATE_WRITE_TIMEOUT)
+        if unfinished:
+            logger.warning("%d state writes still pending after %ss for %s",
+                           len(unfinished), STATE_WRITE_TIMEOUT, ", ".join(submission_ids))
+    
+    async def _update_analysis_state(self, submission_id: str, delta: Dict[str, Any]):
+        """Merge changed fields into the analysis state, resolving once committed"""
+        if self._state_flusher is None or self._state_flusher.done():
+            self._state_flusher = asyncio.create_task(self._flush_state_updates())
+        
+        committed = asyncio.get_running_loop().create_future()
+        await self._state_updates.put((submission_id, delta, committed))
+        await committed
+    
+    async def _flush_state_updates(self):
+        """Commit queued state updates in batches, coalescing updates per submission"""
+        while True:
+            pending = [await self._state_updates.get()]
+            # Firestore allows at most 500 writes per batch
+            while len(pending) < 500 and not self._state_updates.empty():
+                pending.append(self._state_updates.get_nowait())
+            
+            merged: Dict[str, Dict[str, Any]] = {}
+            for submission_id, delta, _ in pending:
+                merged.setdefault(submission_id, {}).update(delta)
+            
+            # Every popped future is resolved below, even if building the
+            # batch fails, so no caller is left waiting on a dead flusher
+            failed: Dict[str, Exception] = {}
+            error = None
+            committed_ok = False
+            try:
+                batch = self.db.batch()
+                for submission_id, delta in merged.items():
+                    # A delta Firestore cannot encode fails only its own submission
+                    try:
+                        doc_ref = self.db.collection("analysis_states").document(submission_id)
+                        batch.set(doc_ref, delta, merge=True)
+                    except Exception as e:
+                        failed[submission_id] = e
+                if len(failed) < len(merged):
+                    await batch.commit()
+                committed_ok = True
+            except Exception as e:
+                error = e
+            finally:
+                if not committed_ok and error is None:
+                    error = RuntimeError("State update flush was interrupted")
+                for submission_id, _, committed in pending:
+                    if committed.done():
+                        continue
+                    failure = failed.get(submission_id, error)
+                    if failure is None:
+                        committed.set_result(None)
+                    else:
+                        committed.set_exception(failure)
     
     async def _save_to_bigquery(self, submission_id: str, analysis_state: Dict[str, Any]):
         """Save completed analysis to BigQuery for historical data"""
@@ -156,47 +487,89 @@ class WorkflowManager:
             "market_data": enriched_profile.get("market_data", {}),
             "traction_metrics": enriched_profile.get("traction_metrics", {}),
             "financials": enriched_profile.get("financials", {}),
-            "created_at": analysis_state.get("started_at"),
-            "updated_at": analysis_state.get("completed_at")
+            "created_at": analysis_state["started_at"].isoformat(),
+            "updated_at": analysis_state["completed_at"].isoformat()
         }
         
-        # Insert into BigQuery
+        if self._bq_flusher is None or self._bq_flusher.done():
+            self._bq_flusher = asyncio.create_task(self._flush_bigquery_rows())
+        await self._bq_rows.put(startup_row)
+    
+    async def _flush_bigquery_rows(self):
+        """Stream buffered rows to BigQuery, one request per batch"""
+        # The table ID is passed as a string, so no get_table metadata round-trip is needed
         table_id = f"{self.project_id}.athena_data.startup_profiles"
-        errors = self.gcp_clients.bq_client.insert_rows_json(
-            self.gcp_clients.bq_client.get_table(table_id), [startup_row]
-        )
-        
-        if errors:
-            print(f"Error inserting to BigQuery: {errors}")
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = [await self._bq_rows.get()]
+            deadline = loop.time() + BQ_FLUSH_INTERVAL
+            while len(rows) < BQ_BATCH_SIZE:
+                try:
+                    rows.append(await asyncio.wait_for(
+                        self._bq_rows.get(), max(deadline - loop.time(), 0)
+                    ))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                errors = await asyncio.to_thread(
+                    self.gcp_clients.bq_client.insert_rows_json,
+                    table_id, rows, row_ids=[row["startup_id"] for row in rows]
+                )
+                if errors:
+                    logger.error("Error inserting to BigQuery: %s", errors)
+            except Exception as e:
+                logger.error("Error inserting to BigQuery: %s", e)
+            finally:
+                for _ in rows:
+                    self._bq_rows.task_done()
+    
+    async def close(self):
+        """Wait for buffered BigQuery rows to be written"""
+        if self._bq_flusher is not None and not self._bq_flusher.done():
+            await self._bq_rows.join()
+            self._bq_flusher.cancel()
     
     async def get_analysis_status(self, submission_id: str) -> Dict[str, Any]:
         """Get current analysis status"""
         doc_ref = self.db.collection("analysis_states").document(submission_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if doc.exists:
             return doc.to_dict()
         else:
             return {"status": "not_found"}
     
-    async def list_recent_analyses(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """List recent analyses"""
-        docs = (
-            self.db.collection("analysis_states")
+    async def list_recent_analyses(self, limit: int = 50,
+                                   start_after: str = None) -> List[Dict[str, Any]]:
+        """List recent analyses, continuing after the given submission ID"""
+        collection = self.db.collection("analysis_states")
+        # Only the listed fields are read; completed analyses carry a small summary map
+        query = (
+            collection
+            .select([
+                "summary", "status", "started_at",
+                "startup_profile.company_name", "final_analysis.recommendation.decision"
+            ])
             .order_by("started_at", direction=firestore.Query.DESCENDING)
-            .limit(limit)
-            .stream()
         )
-        
+        if start_after:
+            cursor = await collection.document(start_after).get(field_paths=["started_at"])
+            if cursor.exists:
+                query = query.start_after(cursor)
         analyses = []
-        for doc in docs:
+        async for doc in query.limit(limit).stream():
             data = doc.to_dict()
+            summary = data.get("summary") or {
+                "company_name": data.get("startup_profile", {}).get("company_name", "Unknown"),
+                "decision": data.get("final_analysis", {}).get("recommendation", {}).get("decision", "Pending")
+            }
             analyses.append({
                 "submission_id": doc.id,
-                "company_name": data.get("startup_profile", {}).get("company_name", "Unknown"),
+                "company_name": summary.get("company_name", "Unknown"),
                 "status": data.get("status", "unknown"),
                 "started_at": data.get("started_at"),
-                "recommendation": data.get("final_analysis", {}).get("recommendation", {}).get("decision", "Pending")
+                "recommendation": summary.get("decision", "Pending")
             })
         
         return analyses
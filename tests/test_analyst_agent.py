@@ -0,0 +1,82 @@
+# tests/test_analyst_agent.py
+import asyncio
+import pytest
+from agents.analyst_agent import AnalystAgent, _parse_batch_memos
+from infrastructure.llm_cache import CachedGemini
+from utils.serialization import jdumps
+
+def _memo(index):
+    return {"startup": index, "swot_analysis": {"strengths": [f"s{index}"]},
+            "investment_memo": f"memo {index}"}
+
+def test_parse_batch_memos_orders_by_startup_index():
+    text = jdumps([_memo(2), _memo(0), _memo(1)])
+
+    parsed = _parse_batch_memos(text, 3)
+
+    assert [item["investment_memo"] for item in parsed] == ["memo 0", "memo 1", "memo 2"]
+    assert parsed[0]["swot_analysis"] == {"strengths": ["s0"]}
+
+def test_parse_batch_memos_defaults_missing_swot():
+    text = jdumps([{"startup": 0, "investment_memo": "memo 0"}])
+    assert _parse_batch_memos(text, 1) == [{"investment_memo": "memo 0", "swot_analysis": {}}]
+
+@pytest.mark.parametrize("reply", [
+    "not json",
+    jdumps({"startup": 0, "investment_memo": "memo 0"}),
+    jdumps([_memo(0)]),
+    jdumps([_memo(0), _memo(1), _memo(2)]),
+    jdumps([_memo(0), {"startup": 1, "swot_analysis": {}}]),
+    jdumps([_memo(0), "memo 1"]),
+    jdumps([_memo(0), _memo(0)]),
+    jdumps([_memo(0), _memo(2)]),
+])
+def test_parse_batch_memos_rejects_bad_shapes(reply):
+    with pytest.raises(ValueError):
+        _parse_batch_memos(reply, 2)
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    def __init__(self, text):
+        self.text = text
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return FakeResponse(self.text)
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    monkeypatch.setattr(CachedGemini, "_store", None)
+    CachedGemini._cache.clear()
+
+    def make(reply):
+        # Only the batch model is exercised, so skip __init__
+        agent = AnalystAgent.__new__(AnalystAgent)
+        agent.gemini_model = CachedGemini(FakeModel(reply))
+        return agent
+
+    yield make
+    CachedGemini._cache.clear()
+
+def _items(count):
+    return [
+        ({"company_name": f"Startup {i}"}, {}, {}, {"overall_score": 0.6},
+         {"decision": "REVIEW"})
+        for i in range(count)
+    ]
+
+def test_generate_batch_memos_returns_parsed_memos(make_agent):
+    agent = make_agent(jdumps([_memo(1), _memo(0)]))
+
+    generated = asyncio.run(agent._generate_batch_memos(_items(2)))
+
+    assert [item["investment_memo"] for item in generated] == ["memo 0", "memo 1"]
+
+def test_generate_batch_memos_signals_fallback_on_bad_reply(make_agent):
+    agent = make_agent(jdumps([_memo(0)]))
+
+    assert asyncio.run(agent._generate_batch_memos(_items(2))) is None
+    # The unusable reply was not cached
+    assert not CachedGemini._cache
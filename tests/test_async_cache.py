@@ -0,0 +1,97 @@
+# tests/test_async_cache.py
+import asyncio
+import pytest
+from infrastructure.async_cache import async_lru_ttl
+
+class Lookup:
+    """Counts upstream calls; fails while failures remain"""
+
+    def __init__(self, failures=0, delay=0.01):
+        self.calls = 0
+        self.failures = failures
+        self.delay = delay
+
+    async def __call__(self, name):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("upstream failed")
+        return name.upper()
+
+def test_concurrent_calls_share_one_upstream_call():
+    lookup = Lookup()
+    cached = async_lru_ttl()(lookup)
+
+    async def run():
+        return await asyncio.gather(*(cached("acme") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["ACME"] * 5
+    assert lookup.calls == 1
+
+def test_results_are_reused_until_they_expire():
+    lookup = Lookup()
+    cached = async_lru_ttl(ttl=0.05)(lookup)
+
+    async def run():
+        await cached("acme")
+        await cached("acme")
+        await asyncio.sleep(0.1)
+        await cached("acme")
+
+    asyncio.run(run())
+    assert lookup.calls == 2
+
+def test_least_recently_used_entry_is_evicted():
+    lookup = Lookup()
+    cached = async_lru_ttl(maxsize=2)(lookup)
+
+    async def run():
+        await cached("a")
+        await cached("b")
+        await cached("a")
+        await cached("c")  # evicts b
+        await cached("a")
+        await cached("b")
+
+    asyncio.run(run())
+    assert lookup.calls == 4
+
+def test_failed_call_is_not_cached():
+    lookup = Lookup(failures=1)
+    cached = async_lru_ttl()(lookup)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await cached("acme")
+        return await cached("acme")
+
+    assert asyncio.run(run()) == "ACME"
+    assert lookup.calls == 2
+
+def test_failure_after_caller_cancelled_is_not_cached():
+    lookup = Lookup(failures=1, delay=0.05)
+    cached = async_lru_ttl()(lookup)
+
+    async def run():
+        caller = asyncio.create_task(cached("acme"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # Let the shielded upstream call finish and fail
+        await asyncio.sleep(0.1)
+        return await cached("acme")
+
+    assert asyncio.run(run()) == "ACME"
+    assert lookup.calls == 2
+
+def test_key_function_selects_cache_key():
+    lookup = Lookup()
+    cached = async_lru_ttl(key=lambda name: name.lower())(lookup)
+
+    async def run():
+        return [await cached("Acme"), await cached("ACME")]
+
+    assert asyncio.run(run()) == ["ACME", "ACME"]
+    assert lookup.calls == 1
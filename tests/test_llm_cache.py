@@ -0,0 +1,58 @@
+# tests/test_llm_cache.py
+import asyncio
+import pytest
+from infrastructure.llm_cache import CachedGemini
+from utils.serialization import jloads
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Returns the queued replies in order and counts calls"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.replies.pop(0))
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(CachedGemini, "_store", None)
+    CachedGemini._cache.clear()
+    yield
+    CachedGemini._cache.clear()
+
+def test_valid_reply_is_cached():
+    model = FakeModel('{"score": 1}')
+    gemini = CachedGemini(model)
+
+    first = asyncio.run(gemini.generate_content_async("prompt", validate=jloads))
+    second = asyncio.run(gemini.generate_content_async("prompt", validate=jloads))
+
+    assert first.text == second.text == '{"score": 1}'
+    assert model.calls == 1
+
+def test_invalid_reply_is_not_cached():
+    model = FakeModel("not json", '{"score": 1}')
+    gemini = CachedGemini(model)
+
+    with pytest.raises(ValueError):
+        asyncio.run(gemini.generate_content_async("prompt", validate=jloads))
+    retried = asyncio.run(gemini.generate_content_async("prompt", validate=jloads))
+
+    assert retried.text == '{"score": 1}'
+    assert model.calls == 2
+
+def test_cached_reply_failing_validation_is_refetched():
+    model = FakeModel("plain text", '{"score": 1}')
+    gemini = CachedGemini(model)
+
+    asyncio.run(gemini.generate_content_async("prompt"))
+    refetched = asyncio.run(gemini.generate_content_async("prompt", validate=jloads))
+
+    assert refetched.text == '{"score": 1}'
+    assert model.calls == 2
@@ -0,0 +1,48 @@
+# tests/test_quant_agent.py
+import itertools
+import pytest
+from agents.quant_agent import QuantAgent
+
+def _ladder_percentile(value, benchmark):
+    """The if/elif ladder _calculate_percentiles replaced"""
+    if value <= benchmark["p25"]:
+        return 25
+    elif value <= benchmark["p50"]:
+        return 50
+    elif value <= benchmark["p75"]:
+        return 75
+    elif value <= benchmark["p90"]:
+        return 90
+    else:
+        return 95
+
+BENCHMARKS = [
+    {"p25": 5, "p50": 10, "p75": 20, "p90": 40},
+    # Lower is better for churn, so its breakpoints descend
+    {"p25": 8, "p50": 5, "p75": 3, "p90": 1.5},
+    {"p25": 1, "p50": 1, "p75": 1, "p90": 1}
+]
+VALUES = [-1, 0, 1, 1.5, 2, 3, 4, 5, 7.5, 8, 9, 10, 15, 20, 30, 40, 41, 1e9]
+
+@pytest.fixture
+def agent():
+    # The percentile math touches no clients, so skip __init__
+    return QuantAgent.__new__(QuantAgent)
+
+@pytest.mark.parametrize("benchmark", BENCHMARKS)
+def test_percentiles_match_ladder(agent, benchmark):
+    expected = [_ladder_percentile(value, benchmark) for value in VALUES]
+    assert agent._calculate_percentiles(VALUES, [benchmark] * len(VALUES)) == expected
+
+def test_percentiles_mix_benchmarks_per_value(agent):
+    pairs = list(itertools.product(VALUES, BENCHMARKS))
+    values = [value for value, _ in pairs]
+    benchmarks = [benchmark for _, benchmark in pairs]
+
+    expected = [_ladder_percentile(value, benchmark) for value, benchmark in pairs]
+    assert agent._calculate_percentiles(values, benchmarks) == expected
+
+def test_percentiles_are_plain_ints(agent):
+    percentiles = agent._calculate_percentiles([12], [BENCHMARKS[0]])
+    assert percentiles == [75]
+    assert type(percentiles[0]) is int
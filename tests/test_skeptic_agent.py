@@ -0,0 +1,70 @@
+# tests/test_skeptic_agent.py
+import itertools
+import numpy as np
+import pytest
+from agents.skeptic_agent import SkepticAgent, score_financials
+
+def _ladder_financial_risks(runway_months, ltv, cac, churn_rate, revenue):
+    """The sequential checks the vectorized rule table replaced"""
+    risks = []
+    risk_score = 0.0
+
+    if runway_months and runway_months < 12:
+        risks.append("Short runway - less than 12 months")
+        risk_score += 0.3
+
+    if cac and ltv and ltv/cac < 3:
+        risks.append("Poor unit economics - LTV/CAC ratio below 3")
+        risk_score += 0.2
+
+    if churn_rate and churn_rate > 15:
+        risks.append("High churn rate")
+        risk_score += 0.2
+
+    if revenue == 0:
+        risks.append("No revenue generated yet")
+        risk_score += 0.1
+
+    return min(risk_score, 1.0), risks
+
+# None is a metric missing from the profile
+GRID = list(itertools.product(
+    [None, 0, 6, 11.99, 12, 24],          # runway_months
+    [None, 0, 100, 299, 300, 900],        # ltv
+    [None, 0, 100],                       # cac
+    [None, 0, 15, 15.5, 30],              # churn_rate
+    [None, 0, 1000]                       # revenue
+))
+
+@pytest.fixture
+def agent():
+    # The financial rules touch no clients, so skip __init__
+    return SkepticAgent.__new__(SkepticAgent)
+
+def _profile(runway_months, ltv, cac, churn_rate, revenue):
+    financials = {"runway_months": runway_months, "revenue": revenue}
+    traction = {"ltv": ltv, "cac": cac, "churn_rate": churn_rate}
+    return {
+        "financials": {key: value for key, value in financials.items() if value is not None},
+        "traction_metrics": {key: value for key, value in traction.items() if value is not None}
+    }
+
+def test_financial_risks_match_ladder(agent):
+    for metrics in GRID:
+        result = agent._analyze_financial_risks(_profile(*metrics), {})
+        expected_score, expected_risks = _ladder_financial_risks(
+            # Absent financials defaulted to 0, absent traction metrics to None
+            metrics[0] if metrics[0] is not None else 0,
+            metrics[1], metrics[2], metrics[3],
+            metrics[4] if metrics[4] is not None else 0
+        )
+        assert result["risk_score"] == expected_score, metrics
+        assert result["risk_factors"] == expected_risks, metrics
+
+def test_score_financials_scores_rows_independently():
+    rows = np.array([list(metrics) for metrics in GRID], dtype=np.float64)
+
+    scores = score_financials(rows)
+
+    expected = [_ladder_financial_risks(*metrics)[0] for metrics in GRID]
+    assert scores.tolist() == expected
@@ -0,0 +1,129 @@
+# tests/test_workflow_manager.py
+import asyncio
+import pytest
+from orchestrator.workflow_manager import WorkflowManager
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, doc_ref, delta, merge=False):
+        # Firestore rejects empty field names while the batch is built
+        if "" in delta:
+            raise ValueError("empty field name")
+        self.writes.append((doc_ref, delta, merge))
+
+    async def commit(self):
+        if self.db.fail_commit:
+            raise RuntimeError("commit failed")
+        self.db.commits.append(self.writes)
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, document_id):
+        return (self.name, document_id)
+
+class FakeFirestore:
+    def __init__(self):
+        self.fail_commit = False
+        self.commits = []
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        return FakeCollection(name)
+
+def _manager(db):
+    # Only the state flusher is exercised, so skip the GCP clients in __init__
+    manager = WorkflowManager.__new__(WorkflowManager)
+    manager.db = db
+    manager._state_updates = asyncio.Queue()
+    manager._state_flusher = None
+    return manager
+
+async def _updates(manager, *updates):
+    return await asyncio.gather(
+        *(manager._update_analysis_state(submission_id, delta) for submission_id, delta in updates),
+        return_exceptions=True
+    )
+
+def test_updates_are_coalesced_per_submission():
+    db = FakeFirestore()
+
+    async def run():
+        manager = _manager(db)
+        return await _updates(
+            manager,
+            ("a", {"current_stage": "ingestion"}),
+            ("b", {"current_stage": "extraction"}),
+            ("a", {"current_stage": "extraction", "status": "processing"})
+        )
+
+    assert asyncio.run(run()) == [None, None, None]
+    assert db.commits == [[
+        (("analysis_states", "a"), {"current_stage": "extraction", "status": "processing"}, True),
+        (("analysis_states", "b"), {"current_stage": "extraction"}, True)
+    ]]
+
+def test_unencodable_delta_fails_only_its_submission():
+    db = FakeFirestore()
+
+    async def run():
+        manager = _manager(db)
+        return await _updates(manager, ("a", {"": 1}), ("b", {"status": "completed"}))
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert good is None
+    assert db.commits == [[(("analysis_states", "b"), {"status": "completed"}, True)]]
+
+def test_batch_with_only_unencodable_deltas_is_not_committed():
+    db = FakeFirestore()
+
+    async def run():
+        manager = _manager(db)
+        return await _updates(manager, ("a", {"": 1}))
+
+    (bad,) = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert db.commits == []
+
+def test_commit_failure_fails_every_caller_and_flusher_keeps_running():
+    db = FakeFirestore()
+    db.fail_commit = True
+
+    async def run():
+        manager = _manager(db)
+        failed = await _updates(manager, ("a", {"status": "processing"}), ("b", {"status": "processing"}))
+        db.fail_commit = False
+        recovered = await _updates(manager, ("a", {"status": "completed"}))
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in failed)
+    assert recovered == [None]
+    assert db.commits == [[(("analysis_states", "a"), {"status": "completed"}, True)]]
+
+def test_cancelled_flush_resolves_popped_updates(monkeypatch):
+    db = FakeFirestore()
+    committing = asyncio.Event()
+
+    async def stalled_commit(self):
+        committing.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(FakeBatch, "commit", stalled_commit)
+
+    async def run():
+        manager = _manager(db)
+        update = asyncio.ensure_future(manager._update_analysis_state("a", {"status": "processing"}))
+        await committing.wait()
+        manager._state_flusher.cancel()
+        with pytest.raises(RuntimeError, match="interrupted"):
+            await update
+
+    asyncio.run(run())
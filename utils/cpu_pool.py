@@ -0,0 +1,28 @@
+# utils/cpu_pool.py
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+# One pool per process so agents do not oversubscribe the CPUs between them.
+# Workers come from a forkserver: forking the app after gRPC channels and
+# their threads exist can deadlock the child. The server preloads only the
+# modules whose functions run in the pool; by default it would re-import
+# __main__ and with it the whole app.
+CPU_POOL_PRELOAD = ["agents.scribe_agent", "agents.librarian_agent"]
+
+@lru_cache(maxsize=None)
+def get_cpu_pool():
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(CPU_POOL_PRELOAD)
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=ctx)
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """Run a pure-Python function in a worker process, outside the GIL
+
+    func must be a top-level function and its arguments picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_pool(), partial(func, *args, **kwargs))
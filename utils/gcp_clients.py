@@ -1,13 +1,44 @@
 # utils/gcp_clients.py
 
-from google.cloud import bigquery, firestore, storage
+from functools import lru_cache
+from google.cloud import bigquery, firestore, speech, storage, vision
+
+# gRPC channel setup is expensive, so clients are built once per process
+@lru_cache(maxsize=None)
+def get_vision_client():
+    # Async gRPC client; first call must happen inside the running event loop
+    return vision.ImageAnnotatorAsyncClient()
+
+@lru_cache(maxsize=None)
+def get_speech_client():
+    return speech.SpeechClient()
+
+@lru_cache(maxsize=None)
+def get_storage_client(project_id):
+    return storage.Client(project=project_id)
+
+@lru_cache(maxsize=None)
+def get_bigquery_client(project_id):
+    return bigquery.Client(project=project_id)
+
+@lru_cache(maxsize=None)
+def get_firestore_client(project_id):
+    return firestore.Client(project=project_id)
 
 class GCPClients:
+    # One instance per project, so every caller shares the same clients
+    _instances = {}
+
+    def __new__(cls, project_id, region="us-central1"):
+        if project_id not in cls._instances:
+            cls._instances[project_id] = super().__new__(cls)
+        return cls._instances[project_id]
+
     def __init__(self, project_id, region="us-central1"):
         self.project_id = project_id
-        self.bq_client = bigquery.Client(project=project_id)
-        self.storage_client = storage.Client(project=project_id)
-        self.firestore_client = firestore.Client(project=project_id)
+        self.bq_client = get_bigquery_client(project_id)
+        self.storage_client = get_storage_client(project_id)
+        self.firestore_client = get_firestore_client(project_id)
 
     def get_bigquery_client(self):
         return self.bq_client
@@ -0,0 +1,22 @@
+# utils/serialization.py
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def jdumps(obj: Any) -> str:
+    """Serialize to compact JSON text, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(obj)
+
+def jloads(text: Any) -> Any:
+    """Parse JSON text, raising json.JSONDecodeError on invalid input"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)